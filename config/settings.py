@@ -34,7 +34,7 @@ class RivaSettings(BaseSettings):
     retry_delay_ms: int = Field(default=1000, env="RIVA_RETRY_DELAY_MS")
     
     max_batch_size: int = Field(default=8, env="RIVA_MAX_BATCH_SIZE")
-    chunk_size_bytes: int = Field(default=8192, env="RIVA_CHUNK_SIZE_BYTES")
+    chunk_size_bytes: int = Field(default=0, env="RIVA_CHUNK_SIZE_BYTES")  # 0 = one partial interval
     enable_partial_results: bool = Field(default=True, env="RIVA_ENABLE_PARTIAL_RESULTS")
     partial_result_interval_ms: int = Field(default=300, env="RIVA_PARTIAL_RESULT_INTERVAL_MS")
     
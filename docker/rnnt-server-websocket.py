@@ -8,6 +8,7 @@ Fixed: Proper disconnect handling to prevent infinite loops
 import os
 import sys
 import uuid
+import asyncio
 from pathlib import Path
 
 # Add parent directory to path for imports
@@ -15,6 +16,7 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 # Import original server components but avoid route conflicts
 try:
+    import rnnt_server
     from rnnt_server import (
         app, logger, RNNT_SERVER_PORT, RNNT_SERVER_HOST, RNNT_MODEL_SOURCE,
         MODEL_LOADED, MODEL_LOAD_TIME, LOG_LEVEL, DEV_MODE,
@@ -48,44 +50,142 @@ except ImportError:
 
 # Import WebSocket components
 from websocket.websocket_handler import WebSocketHandler
+from websocket.batch_scheduler import BatchScheduler
 from fastapi import WebSocket, WebSocketDisconnect
 from fastapi.staticfiles import StaticFiles
 from starlette.websockets import WebSocketState
 
+# Batching configuration
+RNNT_MAX_BATCH_SIZE = int(os.environ.get('RNNT_MAX_BATCH_SIZE', '16'))
+RNNT_MAX_BATCH_DELAY_MS = float(os.environ.get('RNNT_MAX_BATCH_DELAY_MS', '10'))
+RNNT_CUDA_MEMORY_FRACTION = float(os.environ.get('RNNT_CUDA_MEMORY_FRACTION', '0.8'))
+RNNT_MIXED_PRECISION = os.environ.get('RNNT_MIXED_PRECISION', 'true').lower() == 'true'
+RNNT_BATCHING = os.environ.get('RNNT_BATCHING', 'true').lower() == 'true'
+
+# CPU thread layout: intra-op threads (default 1 on GPU hosts) and an
+# optional CPU list such as "0-7,16-23" on the GPU's NUMA node
+RNNT_TORCH_THREADS = os.environ.get('RNNT_TORCH_THREADS', '')
+RNNT_CPU_AFFINITY = os.environ.get('RNNT_CPU_AFFINITY', '')
+
+
+def parse_cpu_list(cpu_list: str) -> set:
+    """
+    Parse a CPU list in taskset/numactl syntax
+    
+    Args:
+        cpu_list: Comma-separated CPUs and ranges, e.g. "0-7,16-23"
+        
+    Returns:
+        Set of CPU indices
+    """
+    cpus = set()
+    for part in cpu_list.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = part.split('-', 1)
+            cpus.update(range(int(start), int(end) + 1))
+        else:
+            cpus.add(int(part))
+    return cpus
+
+
+def configure_cpu_threads():
+    """
+    Clamp PyTorch CPU threading and optionally pin the process to CPUs
+    
+    On GPU hosts the CPU only pads batches and runs VAD, so one intra-op
+    thread avoids oversubscribing cores shared with the event loop.
+    """
+    if RNNT_CPU_AFFINITY:
+        try:
+            os.sched_setaffinity(0, parse_cpu_list(RNNT_CPU_AFFINITY))
+            logger.info(f"📌 Pinned to CPUs {RNNT_CPU_AFFINITY}")
+        except (AttributeError, OSError, ValueError) as e:
+            logger.warning(f"Could not set CPU affinity {RNNT_CPU_AFFINITY!r}: {e}")
+    
+    if RNNT_TORCH_THREADS:
+        num_threads = int(RNNT_TORCH_THREADS)
+    elif torch.cuda.is_available():
+        num_threads = 1
+    else:
+        return  # CPU inference: keep PyTorch's default thread pool
+    
+    torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(num_threads)
+    except RuntimeError:
+        # Only allowed before any inter-op work has started
+        pass
+    logger.info(f"🧵 PyTorch threads: intra-op={torch.get_num_threads()}, inter-op={torch.get_num_interop_threads()}")
+
 # Create WebSocket handler instance
 ws_handler = None
+batch_scheduler = None
 active_connections = set()
 
 @app.on_event("startup")
 async def startup_event_enhanced():
     """Enhanced startup with WebSocket support"""
-    global ws_handler
+    global ws_handler, batch_scheduler
     
     logger.info("🚀 Starting Enhanced RNN-T Server with WebSocket Support")
     logger.info(f"Configuration: port={RNNT_SERVER_PORT}, model={RNNT_MODEL_SOURCE}")
     
+    # Every worker process would load its own copy of the model onto the GPU
+    web_concurrency = int(os.environ.get('WEB_CONCURRENCY', '1'))
+    if web_concurrency > 1:
+        logger.warning(
+            f"⚠️ WEB_CONCURRENCY={web_concurrency}: each worker loads a separate model copy. "
+            f"Run one worker; the batch scheduler shares the model across all connections"
+        )
+    
+    configure_cpu_threads()
+    
     # Load model on startup
     await load_model()
     
-    # Import the global asr_model after loading
-    from rnnt_server import asr_model
+    # Read the global asr_model after loading
+    asr_model = rnnt_server.asr_model
     
     # Verify model is loaded
     if asr_model is None:
         logger.error("❌ ASR model failed to load - WebSocket transcription will not work")
         raise RuntimeError("ASR model not loaded")
     
+    # Cap the caching allocator so staging buffers and activations leave headroom
+    if torch.cuda.is_available():
+        torch.cuda.set_per_process_memory_fraction(RNNT_CUDA_MEMORY_FRACTION)
+    
+    if RNNT_BATCHING:
+        # Start the shared batch scheduler so concurrent clients share forward passes
+        batch_scheduler = BatchScheduler(
+            asr_model,
+            device="cuda" if torch.cuda.is_available() else "cpu",
+            max_batch_size=RNNT_MAX_BATCH_SIZE,
+            max_batch_delay_ms=RNNT_MAX_BATCH_DELAY_MS,
+            mixed_precision=RNNT_MIXED_PRECISION
+        )
+        await batch_scheduler.start()
+    else:
+        logger.info("ℹ️ RNNT_BATCHING=false: each connection runs the model directly")
+    
     # Initialize WebSocket handler with loaded model
-    ws_handler = WebSocketHandler(asr_model)
+    ws_handler = WebSocketHandler(asr_model, batch_scheduler=batch_scheduler, use_batching=RNNT_BATCHING)
     logger.info("✅ WebSocket handler initialized with loaded model")
 
+@app.on_event("shutdown")
+async def shutdown_event_enhanced():
+    """Stop the batch scheduler"""
+    if batch_scheduler:
+        await batch_scheduler.stop()
+
 # Remove the original root route to avoid conflicts
-original_routes = app.routes[:]
-app.routes.clear()
-for route in original_routes:
-    if hasattr(route, 'path') and route.path == '/':
-        continue  # Skip the original root route
-    app.routes.append(route)
+for i, route in enumerate(app.router.routes):
+    if getattr(route, 'path', None) == '/':
+        app.router.routes.pop(i)
+        break
 
 # Mount static files for web interface
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -128,42 +228,48 @@ async def websocket_endpoint(websocket: WebSocket):
     - Responses: JSON transcription results
     """
     client_id = websocket.query_params.get('client_id', str(uuid.uuid4()))
+    frames = asyncio.Queue()
+    pump = None
     
     try:
         # Accept connection
         await ws_handler.connect(websocket, client_id)
         active_connections.add(client_id)
+        pump = asyncio.create_task(ws_handler.pump_frames(websocket, frames))
         
         # Handle messages
-        while True:
+        disconnected = False
+        while not disconnected:
             try:
-                # Check if connection is still open before receiving
-                if websocket.client_state != WebSocketState.CONNECTED:
-                    logger.info(f"WebSocket client {client_id} connection closed")
-                    break
-                    
-                # Receive message (binary or text)
-                message = await websocket.receive()
+                # Wait for one frame, then drain everything already buffered
+                messages = [await frames.get()]
+                while not frames.empty():
+                    messages.append(frames.get_nowait())
                 
-                # Check for disconnect message
-                if "type" in message and message["type"] == "websocket.disconnect":
-                    logger.info(f"WebSocket client {client_id} sent disconnect")
-                    break
+                # Dispatch in arrival order, handing consecutive binary frames over as one batch
+                audio_frames = []
+                for message in messages:
+                    if message["type"] == "websocket.disconnect":
+                        logger.info(f"WebSocket client {client_id} sent disconnect")
+                        disconnected = True
+                        break
+                    
+                    if message.get("bytes") is not None:
+                        # Binary audio data
+                        audio_frames.append(message["bytes"])
+                    elif message.get("text") is not None:
+                        # JSON control message
+                        if audio_frames:
+                            await ws_handler.handle_bytes_batch(websocket, client_id, audio_frames)
+                            audio_frames = []
+                        await ws_handler.handle_control(
+                            websocket,
+                            client_id,
+                            message["text"]
+                        )
                 
-                if "bytes" in message:
-                    # Binary audio data
-                    await ws_handler.handle_message(
-                        websocket, 
-                        client_id, 
-                        message["bytes"]
-                    )
-                elif "text" in message:
-                    # JSON control message
-                    await ws_handler.handle_message(
-                        websocket,
-                        client_id,
-                        message["text"]
-                    )
+                if audio_frames:
+                    await ws_handler.handle_bytes_batch(websocket, client_id, audio_frames)
                     
             except WebSocketDisconnect:
                 logger.info(f"WebSocket client {client_id} disconnected")
@@ -186,6 +292,10 @@ async def websocket_endpoint(websocket: WebSocket):
     except Exception as e:
         logger.error(f"WebSocket connection error for {client_id}: {e}")
     finally:
+        # Stop the receive pump
+        if pump is not None:
+            pump.cancel()
+        
         # Clean disconnect
         active_connections.discard(client_id)
         await ws_handler.disconnect(client_id)
@@ -207,7 +317,8 @@ async def websocket_status():
         "websocket_ready": ws_handler is not None,
         "model_loaded": MODEL_LOADED,
         "active_connections": len(active_connections),
-        "gpu_available": torch.cuda.is_available()
+        "gpu_available": torch.cuda.is_available(),
+        "batching": batch_scheduler.get_metrics() if batch_scheduler else None
     }
 
 # Main execution
@@ -217,5 +328,10 @@ if __name__ == "__main__":
         host=RNNT_SERVER_HOST,
         port=RNNT_SERVER_PORT,
         log_level=LOG_LEVEL.lower(),
-        reload=DEV_MODE
+        reload=DEV_MODE,
+        workers=1,  # one process owns the model; scale with batching, not workers
+        loop="uvloop",
+        http="httptools",
+        ws="websockets",
+        ws_per_message_deflate=False  # small latency-sensitive JSON frames gain nothing from deflate
     )
\ No newline at end of file
@@ -13,10 +13,14 @@ Features:
 
 import ssl
 import asyncio
+import atexit
 import logging
+import queue
 import sys
 import os
 import time
+from functools import partial
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 
 # Add project root to Python path
@@ -24,9 +28,10 @@ PROJECT_ROOT = Path(__file__).parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
 # FastAPI imports
+import anyio
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request, File, UploadFile
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, ORJSONResponse, Response
 import uvicorn
 
 # Load environment variables
@@ -35,6 +40,7 @@ load_dotenv()
 
 # Our optimized WebSocket components
 from websocket.websocket_handler import WebSocketHandler
+from src.asr import shutdown_all as shutdown_riva_channels
 
 # Setup logging
 # Try to use /opt/rnnt/logs, fallback to home directory if not writable
@@ -49,13 +55,21 @@ except (PermissionError, OSError):
     os.makedirs(alt_log_dir, exist_ok=True)
     log_file_path = os.path.join(alt_log_dir, 'https-server.log')
 
+# Request handlers only enqueue records; a background listener thread does the
+# stdout/file writes so the event loop never blocks on handler locks or disk I/O
+log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+log_sinks = [logging.StreamHandler(sys.stdout), logging.FileHandler(log_file_path, mode='a')]
+for sink in log_sinks:
+    sink.setFormatter(log_formatter)
+
+log_queue = queue.SimpleQueue()
+log_listener = QueueListener(log_queue, *log_sinks, respect_handler_level=True)
+log_listener.start()
+atexit.register(log_listener.stop)
+
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler(log_file_path, mode='a')
-    ]
+    handlers=[QueueHandler(log_queue)]
 )
 logger = logging.getLogger(__name__)
 
@@ -63,7 +77,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="RNN-T Production HTTPS Server",
     description="Production WebSocket server for real-time speech transcription",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Global WebSocket handler
@@ -81,13 +96,13 @@ async def startup_event():
     logger.info("🚀 Starting Riva ASR HTTPS Server...")
     logger.info(f"Riva ASR Server: {RIVA_HOST}:{RIVA_PORT}")
     
-    # Create necessary directories
+    # Create necessary directories (in a worker thread, off the event loop)
     try:
-        os.makedirs('/opt/rnnt/logs', exist_ok=True)
+        await anyio.to_thread.run_sync(partial(os.makedirs, '/opt/rnnt/logs', exist_ok=True))
     except PermissionError:
         # Fallback to home directory if /opt/rnnt is not writable
         alt_log_dir = os.path.expanduser('~/rnnt/logs')
-        os.makedirs(alt_log_dir, exist_ok=True)
+        await anyio.to_thread.run_sync(partial(os.makedirs, alt_log_dir, exist_ok=True))
         logger.info(f"Using alternative log directory: {alt_log_dir}")
     
     # Initialize WebSocket handler (Riva client will be initialized on first connection)
@@ -102,6 +117,11 @@ async def startup_event():
     
     logger.info("🎉 Server startup complete - ready for transcription!")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close shared Riva channels"""
+    await shutdown_riva_channels()
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -187,18 +207,18 @@ async def websocket_transcribe(websocket: WebSocket):
     # Extract client ID from query params
     client_id = websocket.query_params.get('client_id', f'client_{id(websocket)}')
     
-    logger.info(f"🔌 WebSocket connection attempt: {client_id}")
+    logger.debug("🔌 WebSocket connection attempt: %s", client_id)
     
     try:
         # Accept connection
         await websocket.accept()
-        logger.info(f"✅ WebSocket connected: {client_id}")
+        logger.debug("✅ WebSocket connected: %s", client_id)
         
         # Handle the WebSocket session using our optimized handler
         await websocket_handler.handle_websocket(websocket, client_id)
         
     except WebSocketDisconnect:
-        logger.info(f"🔌 WebSocket disconnected: {client_id}")
+        logger.debug("🔌 WebSocket disconnected: %s", client_id)
     except Exception as e:
         logger.error(f"❌ WebSocket error for {client_id}: {e}")
         try:
@@ -219,14 +239,20 @@ if static_dir:
 else:
     logger.warning("⚠️ No static directory found")
 
+# Read the UI page once at import so /ui never touches the disk
+ui_html_bytes = None
+if static_dir:
+    ui_path = Path(static_dir) / "index.html"
+    if ui_path.exists():
+        ui_html_bytes = ui_path.read_bytes()
+        logger.info(f"📄 Cached UI page ({len(ui_html_bytes)} bytes) from {ui_path}")
+
 # Serve main UI at /ui
 @app.get("/ui", response_class=HTMLResponse)
 async def serve_ui():
     """Serve the main transcription UI"""
-    if static_dir:
-        ui_path = Path(static_dir) / "index.html"
-        if ui_path.exists():
-            return HTMLResponse(ui_path.read_text())
+    if ui_html_bytes is not None:
+        return Response(ui_html_bytes, media_type="text/html")
     
     return HTMLResponse("""
     <html>
@@ -247,7 +273,39 @@ async def global_exception_handler(request: Request, exc: Exception):
         content={"error": "Internal server error", "detail": str(exc)}
     )
 
+def run_behind_proxy(uds_path: str):
+    """
+    Serve plaintext HTTP/WebSocket on a Unix domain socket
+
+    TLS is terminated by a front proxy (see config/nginx-rnnt.conf), so
+    audio frames skip Python's ssl module and the loopback TCP stack.
+
+    Args:
+        uds_path: Filesystem path of the socket to listen on
+    """
+    logger.info(f"🚀 Starting server on unix:{uds_path} (TLS terminated by proxy)...")
+    uvicorn.run(
+        "rnnt-https-server:app",
+        uds=uds_path,
+        log_level="info",
+        access_log=True,
+        loop="uvloop",
+        http="httptools",
+        ws="websockets",
+        ws_per_message_deflate=False  # small latency-sensitive JSON frames gain nothing from deflate
+    )
+
 if __name__ == "__main__":
+    # Behind a TLS-terminating proxy: listen on a Unix socket, no SSL here
+    uds_path = os.environ.get("RNNT_UDS_PATH")
+    if uds_path:
+        try:
+            run_behind_proxy(uds_path)
+        except Exception as e:
+            logger.error(f"❌ Failed to start server on {uds_path}: {e}")
+            sys.exit(1)
+        sys.exit(0)
+
     # SSL Configuration - try multiple locations
     ssl_locations = [
         ("/opt/rnnt/server.crt", "/opt/rnnt/server.key"),
@@ -275,6 +333,7 @@ if __name__ == "__main__":
     
     logger.info(f"🔒 SSL Certificate: {ssl_cert_path}")
     logger.info(f"🔑 SSL Key: {ssl_key_path}")
+    logger.info("ℹ️ In-process TLS encrypts every frame in userspace; set RNNT_UDS_PATH to run behind a kTLS proxy")
     
     # Start HTTPS server
     try:
@@ -289,7 +348,10 @@ if __name__ == "__main__":
             ssl_cert_reqs=ssl.CERT_NONE,
             log_level="info",
             access_log=True,
-            loop="asyncio"
+            loop="uvloop",
+            http="httptools",
+            ws="websockets",
+            ws_per_message_deflate=False
         )
     except Exception as e:
         logger.error(f"❌ Failed to start HTTPS server: {e}")
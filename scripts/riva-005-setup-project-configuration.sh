@@ -264,7 +264,7 @@ RIVA_RETRY_DELAY_MS=1000
 # Performance Tuning
 # ============================================================================
 RIVA_MAX_BATCH_SIZE=8
-RIVA_CHUNK_SIZE_BYTES=8192
+RIVA_CHUNK_SIZE_BYTES=0  # 0 = one partial-result interval of audio per request
 RIVA_ENABLE_PARTIAL_RESULTS=true
 RIVA_PARTIAL_RESULT_INTERVAL_MS=300
 
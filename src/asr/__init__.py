@@ -1,6 +1,6 @@
 """
 ASR module for NVIDIA Riva integration
 """
-from .riva_client import RivaASRClient
+from .riva_client import RivaASRClient, shutdown_all, utc_isoformat
 
-__all__ = ['RivaASRClient']
\ No newline at end of file
+__all__ = ['RivaASRClient', 'shutdown_all', 'utc_isoformat']
\ No newline at end of file
@@ -9,11 +9,14 @@ import os
 import asyncio
 import logging
 import time
+from math import gcd
 from typing import AsyncGenerator, Dict, Any, Optional, List, Tuple
-from datetime import datetime
+from datetime import datetime, timezone
 import numpy as np
 import grpc
-from dataclasses import dataclass
+import soundfile as sf
+from scipy.signal import resample_poly
+from dataclasses import dataclass, field
 from enum import Enum
 
 try:
@@ -26,6 +29,64 @@ except ImportError as e:
 
 logger = logging.getLogger(__name__)
 
+# Confidence fields differ between Riva releases; resolve them once from the
+# proto descriptors instead of hasattr() on every word of every response
+_WORD_HAS_CONFIDENCE = 'confidence' in riva_asr_pb2.WordInfo.DESCRIPTOR.fields_by_name
+_ALTERNATIVE_HAS_CONFIDENCE = (
+    'confidence' in riva_asr_pb2.SpeechRecognitionAlternative.DESCRIPTOR.fields_by_name
+)
+
+# Channels shared by every RivaASRClient in the process, keyed by
+# (host, port, ssl, ssl_cert); each WebSocket session multiplexes its
+# streams over the same HTTP/2 connection instead of dialing its own
+_CHANNEL_CACHE: Dict[Tuple[str, int, bool, Optional[str]], grpc.aio.Channel] = {}
+_CHANNEL_LOCK: Optional[asyncio.Lock] = None
+
+# HTTP/2 settings for the long-lived shared channel
+_CHANNEL_OPTIONS = [
+    ('grpc.keepalive_time_ms', 30000),
+    ('grpc.keepalive_timeout_ms', 10000),
+    ('grpc.keepalive_permit_without_calls', 1),
+    ('grpc.http2.max_pings_without_data', 0),
+    ('grpc.max_concurrent_streams', 1000),
+]
+
+
+# (epoch second, ISO string) of the last formatted second; one tuple so
+# readers in other threads never see a mismatched pair
+_iso_cache: Tuple[int, str] = (-1, '')
+
+
+def utc_isoformat() -> str:
+    """
+    Current UTC time in datetime.utcnow().isoformat() format
+    
+    The date/time part is formatted once per second and cached; only the
+    microsecond suffix is built per call.
+    
+    Returns:
+        ISO 8601 timestamp string without timezone suffix
+    """
+    global _iso_cache
+    now = time.time()
+    sec = int(now)
+    cached_sec, cached_str = _iso_cache
+    if sec != cached_sec:
+        cached_str = datetime.fromtimestamp(sec, timezone.utc).replace(tzinfo=None).isoformat()
+        _iso_cache = (sec, cached_str)
+    micros = int((now - sec) * 1_000_000)
+    return f'{cached_str}.{micros:06d}' if micros else cached_str
+
+
+async def shutdown_all():
+    """Close every shared Riva channel (call once at process shutdown)"""
+    channels = list(_CHANNEL_CACHE.values())
+    _CHANNEL_CACHE.clear()
+    for channel in channels:
+        await channel.close()
+    if channels:
+        logger.info(f"Closed {len(channels)} shared Riva channel(s)")
+
 
 class TranscriptionEventType(Enum):
     """Types of transcription events"""
@@ -37,28 +98,29 @@ class TranscriptionEventType(Enum):
 @dataclass
 class RivaConfig:
     """Riva ASR configuration"""
-    host: str = os.getenv("RIVA_HOST", "localhost")
-    port: int = int(os.getenv("RIVA_PORT", "50051"))
-    ssl: bool = os.getenv("RIVA_SSL", "false").lower() == "true"
-    ssl_cert: Optional[str] = os.getenv("RIVA_SSL_CERT")
-    api_key: Optional[str] = os.getenv("RIVA_API_KEY")
+    host: str = field(default_factory=lambda: os.getenv("RIVA_HOST", "localhost"))
+    port: int = field(default_factory=lambda: int(os.getenv("RIVA_PORT", "50051")))
+    ssl: bool = field(default_factory=lambda: os.getenv("RIVA_SSL", "false").lower() == "true")
+    ssl_cert: Optional[str] = field(default_factory=lambda: os.getenv("RIVA_SSL_CERT"))
+    api_key: Optional[str] = field(default_factory=lambda: os.getenv("RIVA_API_KEY"))
     
     # Model settings
-    model: str = os.getenv("RIVA_MODEL", "parakeet-0.6b-en-US-asr-streaming")
-    language_code: str = os.getenv("RIVA_LANGUAGE_CODE", "en-US")
-    enable_punctuation: bool = os.getenv("RIVA_ENABLE_AUTOMATIC_PUNCTUATION", "true").lower() == "true"
-    enable_word_offsets: bool = os.getenv("RIVA_ENABLE_WORD_TIME_OFFSETS", "true").lower() == "true"
+    model: str = field(default_factory=lambda: os.getenv("RIVA_MODEL", "parakeet-0.6b-en-US-asr-streaming"))
+    language_code: str = field(default_factory=lambda: os.getenv("RIVA_LANGUAGE_CODE", "en-US"))
+    enable_punctuation: bool = field(default_factory=lambda: os.getenv("RIVA_ENABLE_AUTOMATIC_PUNCTUATION", "true").lower() == "true")
+    enable_word_offsets: bool = field(default_factory=lambda: os.getenv("RIVA_ENABLE_WORD_TIME_OFFSETS", "true").lower() == "true")
     
     # Connection settings
-    timeout_ms: int = int(os.getenv("RIVA_TIMEOUT_MS", "5000"))
-    max_retries: int = int(os.getenv("RIVA_MAX_RETRIES", "3"))
-    retry_delay_ms: int = int(os.getenv("RIVA_RETRY_DELAY_MS", "1000"))
+    timeout_ms: int = field(default_factory=lambda: int(os.getenv("RIVA_TIMEOUT_MS", "5000")))
+    max_retries: int = field(default_factory=lambda: int(os.getenv("RIVA_MAX_RETRIES", "3")))
+    retry_delay_ms: int = field(default_factory=lambda: int(os.getenv("RIVA_RETRY_DELAY_MS", "1000")))
     
     # Performance settings
-    max_batch_size: int = int(os.getenv("RIVA_MAX_BATCH_SIZE", "8"))
-    chunk_size_bytes: int = int(os.getenv("RIVA_CHUNK_SIZE_BYTES", "8192"))
-    enable_partials: bool = os.getenv("RIVA_ENABLE_PARTIAL_RESULTS", "true").lower() == "true"
-    partial_interval_ms: int = int(os.getenv("RIVA_PARTIAL_RESULT_INTERVAL_MS", "300"))
+    max_batch_size: int = field(default_factory=lambda: int(os.getenv("RIVA_MAX_BATCH_SIZE", "8")))
+    # 0 = derive from partial_interval_ms (see RivaASRClient._chunk_size_bytes)
+    chunk_size_bytes: int = field(default_factory=lambda: int(os.getenv("RIVA_CHUNK_SIZE_BYTES", "0")))
+    enable_partials: bool = field(default_factory=lambda: os.getenv("RIVA_ENABLE_PARTIAL_RESULTS", "true").lower() == "true")
+    partial_interval_ms: int = field(default_factory=lambda: int(os.getenv("RIVA_PARTIAL_RESULT_INTERVAL_MS", "300")))
 
 
 class RivaASRClient:
@@ -76,8 +138,14 @@ class RivaASRClient:
             mock_mode: If True, provide mock responses instead of connecting to real Riva
         """
         self.config = config or RivaConfig()
-        self.auth = None
-        self.asr_service = None
+        
+        # Streaming config template, built in connect()
+        self._streaming_config_template: Optional[riva_asr_pb2.StreamingRecognitionConfig] = None
+        
+        # Async channel/stub for all RPCs (no thread hop per call or chunk)
+        self.aio_channel: Optional[grpc.aio.Channel] = None
+        self.aio_stub = None
+        self.metadata: Optional[List[Tuple[str, str]]] = None
         self.connected = False
         self.segment_id = 0
         self.mock_mode = mock_mode
@@ -113,27 +181,15 @@ class RivaASRClient:
             return True
             
         try:
-            # Create authentication
             uri = f"{self.config.host}:{self.config.port}"
             
-            if self.config.ssl:
-                # SSL connection
-                if self.config.ssl_cert:
-                    with open(self.config.ssl_cert, 'rb') as f:
-                        creds = grpc.ssl_channel_credentials(f.read())
-                    self.auth = riva.client.Auth(uri=uri, use_ssl=True, ssl_cert=creds)
-                else:
-                    self.auth = riva.client.Auth(uri=uri, use_ssl=True)
-            else:
-                # Insecure connection
-                self.auth = riva.client.Auth(uri=uri, use_ssl=False)
-            
-            # Add API key if provided
-            if self.config.api_key:
-                self.auth.metadata = [('authorization', f'Bearer {self.config.api_key}')]
+            # Async channel shared by streaming, offline and ListModels calls
+            self.metadata = [('authorization', f'Bearer {self.config.api_key}')] if self.config.api_key else None
+            self.aio_channel = await self._get_shared_channel(uri)
+            self.aio_stub = riva_asr_pb2_grpc.RivaSpeechRecognitionStub(self.aio_channel)
             
-            # Create ASR service
-            self.asr_service = riva.client.ASRService(self.auth)
+            # Per-stream fields (sample rate, partials, hotwords) are set on a copy
+            self._streaming_config_template = self._build_streaming_config_template()
             
             # Test connection by listing models
             await self._list_models()
@@ -147,6 +203,69 @@ class RivaASRClient:
             self.connected = False
             return False
     
+    def _build_streaming_config_template(self) -> riva_asr_pb2.StreamingRecognitionConfig:
+        """
+        Build the session-independent part of the streaming recognition config
+        
+        Returns:
+            StreamingRecognitionConfig proto to copy per stream
+        """
+        return riva.client.StreamingRecognitionConfig(
+            config=riva.client.RecognitionConfig(
+                encoding=riva.client.AudioEncoding.LINEAR_PCM,
+                language_code=self.config.language_code,
+                model=self.config.model,
+                max_alternatives=1,
+                enable_automatic_punctuation=self.config.enable_punctuation,
+                enable_word_time_offsets=self.config.enable_word_offsets,
+                verbatim_transcripts=False,
+                profanity_filter=False
+            )
+        )
+    
+    async def _get_shared_channel(self, uri: str) -> grpc.aio.Channel:
+        """
+        Get the process-wide grpc.aio channel for this server, creating it once
+        
+        Args:
+            uri: host:port of the Riva server
+            
+        Returns:
+            Async gRPC channel
+        """
+        global _CHANNEL_LOCK
+        if _CHANNEL_LOCK is None:
+            _CHANNEL_LOCK = asyncio.Lock()
+        
+        key = (self.config.host, self.config.port, self.config.ssl, self.config.ssl_cert)
+        async with _CHANNEL_LOCK:
+            channel = _CHANNEL_CACHE.get(key)
+            if channel is None:
+                channel = self._create_aio_channel(uri)
+                _CHANNEL_CACHE[key] = channel
+                logger.info(f"Opened shared Riva channel to {uri}")
+            return channel
+    
+    def _create_aio_channel(self, uri: str) -> grpc.aio.Channel:
+        """
+        Create a grpc.aio channel to the Riva server
+        
+        Args:
+            uri: host:port of the Riva server
+            
+        Returns:
+            Async gRPC channel
+        """
+        if not self.config.ssl:
+            return grpc.aio.insecure_channel(uri, options=_CHANNEL_OPTIONS)
+        
+        if self.config.ssl_cert:
+            with open(self.config.ssl_cert, 'rb') as f:
+                creds = grpc.ssl_channel_credentials(f.read())
+        else:
+            creds = grpc.ssl_channel_credentials()
+        return grpc.aio.secure_channel(uri, creds, options=_CHANNEL_OPTIONS)
+    
     async def _list_models(self) -> List[str]:
         """
         List available ASR models on Riva server
@@ -156,11 +275,9 @@ class RivaASRClient:
             List of model names
         """
         try:
-            response = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: self.asr_service.stub.ListModels(
-                    riva_asr_pb2.ListModelsRequest()
-                )
+            response = await self.aio_stub.ListModels(
+                riva_asr_pb2.ListModelsRequest(),
+                metadata=self.metadata
             )
             models = [model.name for model in response.models]
             logger.info(f"Available Riva models: {models}")
@@ -204,25 +321,16 @@ class RivaASRClient:
             return
         
         try:
-            # Create streaming config
-            config = riva.client.StreamingRecognitionConfig(
-                config=riva.client.RecognitionConfig(
-                    encoding=riva.client.AudioEncoding.LINEAR_PCM,
-                    language_code=self.config.language_code,
-                    model=self.config.model,
-                    sample_rate_hertz=sample_rate,
-                    max_alternatives=1,
-                    enable_automatic_punctuation=self.config.enable_punctuation,
-                    enable_word_time_offsets=self.config.enable_word_offsets,
-                    verbatim_transcripts=False,
-                    profanity_filter=False,
-                    # speech_contexts for hotwords if provided
-                    speech_contexts=[
-                        riva.client.SpeechContext(phrases=hotwords, boost=10.0)
-                    ] if hotwords else None
-                ),
-                interim_results=enable_partials and self.config.enable_partials
-            )
+            # Create streaming config from the prebuilt template
+            config = riva_asr_pb2.StreamingRecognitionConfig()
+            config.CopyFrom(self._streaming_config_template)
+            config.config.sample_rate_hertz = sample_rate
+            config.interim_results = enable_partials and self.config.enable_partials
+            if hotwords:
+                # speech_contexts for hotwords
+                context = config.config.speech_contexts.add()
+                context.phrases.extend(hotwords)
+                context.boost = 10.0
             
             # Create audio generator with retry logic
             audio_gen = self._audio_generator_with_retry(audio_iterator, sample_rate)
@@ -243,6 +351,29 @@ class RivaASRClient:
             logger.error(f"Unexpected error during streaming: {e}")
             yield self._create_error_event(str(e))
     
+    def _chunk_size_bytes(self, sample_rate: int) -> int:
+        """
+        Bytes of 16-bit mono audio per StreamingRecognizeRequest
+        
+        An explicit RIVA_CHUNK_SIZE_BYTES wins. Otherwise one request carries
+        one partial-result interval of audio, so small WebSocket frames are
+        coalesced and partials are not delayed; final-only streams use at
+        least 500ms per request.
+        
+        Args:
+            sample_rate: Audio sample rate in Hz
+            
+        Returns:
+            Chunk size in bytes (even, so samples are never split)
+        """
+        if self.config.chunk_size_bytes > 0:
+            return self.config.chunk_size_bytes
+        
+        interval_ms = self.config.partial_interval_ms
+        if not self.config.enable_partials:
+            interval_ms = max(interval_ms, 500)
+        return max(int(sample_rate * interval_ms / 1000), 1) * 2
+    
     async def _audio_generator_with_retry(
         self,
         audio_iterator: AsyncGenerator[bytes, None],
@@ -258,28 +389,56 @@ class RivaASRClient:
         Yields:
             Audio chunks sized for optimal Riva processing
         """
+        # Consumed bytes are skipped with a read offset and only compacted
+        # once they make up half the buffer, so each byte is copied O(1) times
         buffer = bytearray()
-        chunk_size = self.config.chunk_size_bytes
-        audio_start_time = time.time()
+        read_pos = 0
+        chunk_size = self._chunk_size_bytes(sample_rate)
         
         async for audio_chunk in audio_iterator:
+            if read_pos == len(buffer) and isinstance(audio_chunk, bytes):
+                # Nothing pending: emit whole chunks straight from the frame
+                # (a full-length slice of bytes is the same object, no copy)
+                buffer.clear()
+                read_pos = 0
+                offset = 0
+                while len(audio_chunk) - offset >= chunk_size:
+                    yield audio_chunk[offset:offset + chunk_size]
+                    offset += chunk_size
+                    self.total_audio_duration += (chunk_size // 2) / sample_rate
+                
+                # Only the tail waits in the buffer
+                if offset < len(audio_chunk):
+                    with memoryview(audio_chunk) as view:
+                        buffer.extend(view[offset:])
+                continue
+            
             # Add to buffer
             buffer.extend(audio_chunk)
             
             # Yield chunks of optimal size
-            while len(buffer) >= chunk_size:
-                yield bytes(buffer[:chunk_size])
-                buffer = buffer[chunk_size:]
+            while len(buffer) - read_pos >= chunk_size:
+                with memoryview(buffer) as view:
+                    chunk = bytes(view[read_pos:read_pos + chunk_size])
+                read_pos += chunk_size
+                yield chunk
                 
                 # Update metrics
                 samples_processed = chunk_size // 2  # Assuming 16-bit audio
                 duration = samples_processed / sample_rate
                 self.total_audio_duration += duration
+            
+            if read_pos > len(buffer) // 2:
+                del buffer[:read_pos]
+                read_pos = 0
         
         # Yield remaining buffer
-        if buffer:
-            yield bytes(buffer)
-            samples_processed = len(buffer) // 2
+        remaining = len(buffer) - read_pos
+        if remaining:
+            with memoryview(buffer) as view:
+                chunk = bytes(view[read_pos:])
+            yield chunk
+            samples_processed = remaining // 2
             duration = samples_processed / sample_rate
             self.total_audio_duration += duration
     
@@ -311,32 +470,13 @@ class RivaASRClient:
                     audio_content=audio_chunk
                 )
         
-        # Convert async generator to sync for gRPC
-        request_iter = self._async_to_sync_generator(request_generator())
-        
-        # Perform streaming recognition
-        responses = self.asr_service.stub.StreamingRecognize(request_iter)
+        # Stream requests and responses on the event loop via grpc.aio
+        call = self.aio_stub.StreamingRecognize(request_generator(), metadata=self.metadata)
         
         # Yield responses
-        for response in responses:
+        async for response in call:
             yield response
     
-    def _async_to_sync_generator(self, async_gen):
-        """Convert async generator to sync generator for gRPC"""
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            # No event loop in current thread, create a new one
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-        
-        while True:
-            try:
-                future = asyncio.ensure_future(async_gen.__anext__(), loop=loop)
-                yield loop.run_until_complete(future)
-            except StopAsyncIteration:
-                break
-    
     async def _process_response(
         self,
         response: Any,
@@ -377,17 +517,6 @@ class RivaASRClient:
                 return None
             self.last_partial_time = current_time
         
-        # Extract word timings if available
-        words = []
-        if self.config.enable_word_offsets and alternative.words:
-            for word_info in alternative.words:
-                words.append({
-                    'word': word_info.word,
-                    'start': word_info.start_time,
-                    'end': word_info.end_time,
-                    'confidence': word_info.confidence if hasattr(word_info, 'confidence') else 0.95
-                })
-        
         # Create event
         event_type = TranscriptionEventType.FINAL if is_final else TranscriptionEventType.PARTIAL
         
@@ -396,21 +525,50 @@ class RivaASRClient:
             'segment_id': self.segment_id,
             'text': transcript,
             'is_final': is_final,
-            'timestamp': datetime.utcnow().isoformat(),
+            'timestamp': utc_isoformat(),
             'processing_time_ms': round((current_time - start_time) * 1000, 2)
         }
         
-        # Add words for final results
+        # Add words for final results (partials never carry them, so skip the extraction)
         if is_final:
-            event['words'] = words
-            event['confidence'] = alternative.confidence if hasattr(alternative, 'confidence') else 0.95
+            event['words'] = self._extract_words(alternative) if self.config.enable_word_offsets else []
+            event['confidence'] = alternative.confidence if _ALTERNATIVE_HAS_CONFIDENCE else 0.95
             self.segment_id += 1
             self.total_segments += 1
         
-        logger.debug(f"Transcription event: type={event_type.value}, text='{transcript[:50]}...'")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Transcription event: type=%s, text=%r", event_type.value, transcript[:50])
         
         return event
     
+    @staticmethod
+    def _extract_words(alternative: Any) -> List[Dict[str, Any]]:
+        """
+        Convert Riva word infos into the word dicts of the JSON contract
+        
+        Args:
+            alternative: Riva SpeechRecognitionAlternative
+            
+        Returns:
+            List of word dicts with word, start, end and confidence
+        """
+        # Read each repeated field column-wise in one pass over the C-level
+        # container, then zip into the per-word objects the clients consume
+        infos = alternative.words
+        if not infos:
+            return []
+        texts = [w.word for w in infos]
+        starts = [w.start_time for w in infos]
+        ends = [w.end_time for w in infos]
+        if _WORD_HAS_CONFIDENCE:
+            confidences = [w.confidence for w in infos]
+        else:
+            confidences = [0.95] * len(texts)
+        return [
+            {'word': word, 'start': start, 'end': end, 'confidence': confidence}
+            for word, start, end, confidence in zip(texts, starts, ends, confidences)
+        ]
+    
     def _create_error_event(self, error_message: str) -> Dict[str, Any]:
         """
         Create error event
@@ -425,7 +583,7 @@ class RivaASRClient:
             'type': TranscriptionEventType.ERROR.value,
             'error': error_message,
             'segment_id': self.segment_id,
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': utc_isoformat()
         }
     
     async def transcribe_file(self, file_path: str, sample_rate: int = 16000) -> Dict[str, Any]:
@@ -444,16 +602,14 @@ class RivaASRClient:
                 return self._create_error_event("Not connected to Riva server")
         
         try:
-            import soundfile as sf
-            
             # Read audio file
             audio, file_sr = sf.read(file_path, dtype='int16')
             
-            # Resample if needed
+            # Resample if needed (polyphase FIR, O(N * taps) rather than a full-file FFT)
             if file_sr != sample_rate:
-                import scipy.signal
-                audio = scipy.signal.resample(audio, int(len(audio) * sample_rate / file_sr))
-                audio = audio.astype(np.int16)
+                g = gcd(file_sr, sample_rate)
+                audio = resample_poly(audio, sample_rate // g, file_sr // g, axis=0)
+                audio = np.clip(audio, -32768, 32767).astype(np.int16)
             
             # Convert to bytes
             audio_bytes = audio.tobytes()
@@ -471,9 +627,9 @@ class RivaASRClient:
             
             # Perform offline recognition
             start_time = time.time()
-            response = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: self.asr_service.offline_recognize(audio_bytes, config)
+            response = await self.aio_stub.Recognize(
+                riva_asr_pb2.RecognizeRequest(config=config, audio=audio_bytes),
+                metadata=self.metadata
             )
             
             # Process response
@@ -482,15 +638,7 @@ class RivaASRClient:
                 transcript = alternative.transcript.strip()
                 
                 # Extract words
-                words = []
-                if alternative.words:
-                    for word_info in alternative.words:
-                        words.append({
-                            'word': word_info.word,
-                            'start': word_info.start_time,
-                            'end': word_info.end_time,
-                            'confidence': word_info.confidence if hasattr(word_info, 'confidence') else 0.95
-                        })
+                words = self._extract_words(alternative)
                 
                 return {
                     'type': TranscriptionEventType.FINAL.value,
@@ -498,10 +646,10 @@ class RivaASRClient:
                     'text': transcript,
                     'is_final': True,
                     'words': words,
-                    'confidence': alternative.confidence if hasattr(alternative, 'confidence') else 0.95,
+                    'confidence': alternative.confidence if _ALTERNATIVE_HAS_CONFIDENCE else 0.95,
                     'duration': len(audio) / sample_rate,
                     'processing_time_ms': round((time.time() - start_time) * 1000, 2),
-                    'timestamp': datetime.utcnow().isoformat()
+                    'timestamp': utc_isoformat()
                 }
             else:
                 return {
@@ -510,7 +658,7 @@ class RivaASRClient:
                     'text': "",
                     'is_final': True,
                     'words': [],
-                    'timestamp': datetime.utcnow().isoformat()
+                    'timestamp': utc_isoformat()
                 }
                 
         except Exception as e:
@@ -518,10 +666,10 @@ class RivaASRClient:
             return self._create_error_event(str(e))
     
     async def close(self):
-        """Close connection to Riva server"""
+        """Release this client's connection (the shared channel stays open)"""
         self.connected = False
-        self.auth = None
-        self.asr_service = None
+        self.aio_channel = None
+        self.aio_stub = None
         logger.info("RivaASRClient connection closed")
     
     async def _mock_stream_transcribe(
@@ -639,7 +787,6 @@ async def test_riva_client():
     
     # Save to temp file
     with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as f:
-        import soundfile as sf
         sf.write(f.name, audio, sample_rate)
         temp_path = f.name
     
@@ -672,5 +819,12 @@ async def test_riva_client():
 
 
 if __name__ == "__main__":
+    # Same event loop the WebSocket servers run on
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    
     # Run test
     asyncio.run(test_riva_client())
\ No newline at end of file
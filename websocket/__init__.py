@@ -5,5 +5,6 @@ WebSocket streaming module for RNN-T real-time transcription
 from .audio_processor import AudioProcessor
 from .websocket_handler import WebSocketHandler
 from .transcription_stream import TranscriptionStream
+from .batch_scheduler import BatchScheduler
 
-__all__ = ['AudioProcessor', 'WebSocketHandler', 'TranscriptionStream']
\ No newline at end of file
+__all__ = ['AudioProcessor', 'WebSocketHandler', 'TranscriptionStream', 'BatchScheduler']
\ No newline at end of file
@@ -7,12 +7,114 @@ Handles buffering, resampling, and VAD for real-time audio
 import numpy as np
 import torch
 import torchaudio
-from collections import deque
+from scipy.signal import lfilter
 from typing import Optional, Tuple, List
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Optional: fused PCM16 decode + VAD statistics in one native pass
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# First-order high-pass coefficient used by the VAD (cutoff ~300Hz at 16kHz)
+_HIGHPASS_ALPHA = 0.95
+
+# PCM16 -> [-1, 1) scale as float32 so decoding stays in float32 lanes
+_INT16_SCALE = np.float32(1.0 / 32768.0)
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _decode_and_vad_stats(src, dst, alpha):
+        """
+        Decode PCM16 into dst and compute high-passed energy and zero crossings
+        
+        Matches _pcm16_to_float32 followed by the NumPy path of
+        AudioProcessor._detect_voice_activity.
+        
+        Args:
+            src: int16 samples
+            dst: float32 output buffer of the same length
+            alpha: High-pass filter coefficient
+            
+        Returns:
+            Tuple of (sum of squares, zero crossing count)
+        """
+        scale = _INT16_SCALE
+        energy_sum = 0.0
+        zero_crossings = 0
+        prev_x = 0.0
+        prev_y = 0.0
+        for i in range(src.shape[0]):
+            v = np.float32(src[i]) * scale
+            dst[i] = v
+            x = np.float64(v)
+            if i == 0:
+                y = x
+            else:
+                y = alpha * (prev_y + x - prev_x)
+                if prev_y * y < 0:
+                    zero_crossings += 1
+            energy_sum += y * y
+            prev_x = x
+            prev_y = y
+        return energy_sum, zero_crossings
+
+    # Compile (or load from cache) now rather than on the first audio frame
+    _decode_and_vad_stats(np.zeros(2, dtype=np.int16), np.empty(2, dtype=np.float32), _HIGHPASS_ALPHA)
+
+
+def _pcm16_to_float32(
+    audio_data: bytes,
+    out: Optional[np.ndarray] = None,
+    big_endian: bool = False
+) -> np.ndarray:
+    """
+    Decode PCM16 bytes to float32 samples in [-1, 1)
+    
+    Args:
+        audio_data: Raw PCM16 bytes (little-endian from the browser clients)
+        out: Optional float32 buffer of at least len(audio_data) // 2 samples
+        big_endian: Input samples are big-endian
+        
+    Returns:
+        Float32 audio array (a view into out when given)
+    """
+    # Zero-copy int16 view, then byte-swap (if needed), widen and scale in a
+    # single ufunc pass
+    src = np.frombuffer(audio_data, dtype='>i2' if big_endian else '<i2')
+    if out is None:
+        out = np.empty(src.shape[0], dtype=np.float32)
+    else:
+        out = out[:src.shape[0]]
+    np.multiply(src, _INT16_SCALE, out=out, casting='unsafe')
+    return out
+
+
+def _float32_to_pcm16(audio: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Quantize float samples in [-1, 1] to PCM16, saturating out-of-range values
+    
+    Args:
+        audio: Float audio samples
+        out: Optional int16 buffer of at least len(audio) samples
+        
+    Returns:
+        Int16 audio array (a view into out when given)
+    """
+    scaled = np.multiply(audio, np.float32(32768.0), dtype=np.float32)
+    np.clip(scaled, -32768.0, 32767.0, out=scaled)
+    np.rint(scaled, out=scaled)
+    if out is None:
+        return scaled.astype(np.int16)
+    out = out[:scaled.shape[0]]
+    np.copyto(out, scaled, casting='unsafe')
+    return out
+
 
 class AudioProcessor:
     """
@@ -20,9 +122,9 @@ class AudioProcessor:
     
     Features:
     - Automatic resampling to 16kHz
-    - Sliding window buffering
     - Voice Activity Detection (VAD)
     - Silence detection for segmentation
+    - Segment buffer kept as int16 PCM (half the memory of float32)
     """
     
     def __init__(
@@ -59,10 +161,16 @@ class AudioProcessor:
         self.max_segment_samples = int(target_sample_rate * max_segment_duration_s)
         
         # Initialize buffers
-        self.audio_buffer = deque(maxlen=self.buffer_size)
-        self.current_segment = []
+        # Segment audio is written in place into a buffer sized for the longest
+        # segment. It holds int16 PCM, the wire format, and is only dequantized
+        # on the model device.
+        self._seg_buf = np.empty(self.max_segment_samples, dtype=np.int16)
+        self._seg_len = 0
         self.silence_counter = 0
         
+        # Decode scratch for incoming PCM16 chunks (grown on demand)
+        self._f32_scratch = np.empty(self.chunk_size, dtype=np.float32)
+        
         # Resampler (will be created when needed)
         self.resampler = None
         self.last_sample_rate = None
@@ -73,7 +181,8 @@ class AudioProcessor:
         self,
         audio_data: bytes,
         sample_rate: int = 16000,
-        dtype: str = 'int16'
+        dtype: str = 'int16',
+        endian: str = 'le'
     ) -> Tuple[Optional[np.ndarray], bool]:
         """
         Process incoming audio chunk
@@ -82,41 +191,79 @@ class AudioProcessor:
             audio_data: Raw audio bytes
             sample_rate: Sample rate of input audio
             dtype: Data type of audio samples
+            endian: Byte order of the samples, 'le' or 'be'. Callers that
+                receive big-endian PCM pass 'be' so the swap happens inside
+                the NumPy decode rather than per sample in Python
             
         Returns:
-            Tuple of (audio_array, is_end_of_segment)
+            Tuple of (audio_array, is_end_of_segment). For 16kHz int16 input
+            audio_array is a view into a scratch buffer that the next call
+            overwrites; copy it to keep it. The float32 samples only feed
+            VAD; the segment itself is buffered as int16.
         """
-        # Convert bytes to numpy array
-        audio_array = np.frombuffer(audio_data, dtype=dtype).astype(np.float32)
-        
-        # Normalize to [-1, 1]
+        # Convert bytes to numpy array, normalizing PCM16 to [-1, 1]
         if dtype == 'int16':
-            audio_array = audio_array / 32768.0
+            num_samples = len(audio_data) // 2
+            scratch_size = self._f32_scratch.shape[0]
+            if num_samples > scratch_size:
+                self._f32_scratch = np.empty(num_samples, dtype=np.float32)
+            elif scratch_size > 2 * self.chunk_size and num_samples <= self.chunk_size:
+                # Give back memory grown for a one-off oversized frame
+                self._f32_scratch = np.empty(self.chunk_size, dtype=np.float32)
+        
+        big_endian = endian == 'be'
         
-        # Resample if needed
-        if sample_rate != self.target_sample_rate:
-            audio_array = self._resample(audio_array, sample_rate)
+        # 16kHz PCM16 is buffered exactly as received, without requantizing
+        pcm = None
+        if dtype == 'int16' and sample_rate == self.target_sample_rate:
+            pcm = np.frombuffer(audio_data, dtype='>i2' if big_endian else '<i2')
         
-        # Detect voice activity
-        has_voice = self._detect_voice_activity(audio_array)
+        if pcm is not None and NUMBA_AVAILABLE and not big_endian:
+            # Decode and VAD statistics in a single pass
+            audio_array = self._f32_scratch[:num_samples]
+            if num_samples == 0:
+                has_voice = False
+            else:
+                energy_sum, zero_crossings = _decode_and_vad_stats(
+                    pcm, audio_array, _HIGHPASS_ALPHA
+                )
+                has_voice = self._classify_voice(energy_sum, zero_crossings, num_samples)
+        else:
+            if dtype == 'int16':
+                audio_array = _pcm16_to_float32(audio_data, out=self._f32_scratch, big_endian=big_endian)
+            else:
+                src_dtype = np.dtype(dtype).newbyteorder('>' if big_endian else '<')
+                audio_array = np.frombuffer(audio_data, dtype=src_dtype).astype(np.float32)
+            
+            # Resample if needed
+            if sample_rate != self.target_sample_rate:
+                audio_array = self._resample(audio_array, sample_rate)
+            
+            # Detect voice activity
+            has_voice = self._detect_voice_activity(audio_array)
+        
+        if pcm is None:
+            pcm = _float32_to_pcm16(audio_array)
         
         # Check for end of segment BEFORE adding more audio
         is_end_of_segment = False
         
         # Force segmentation if adding this chunk would exceed max duration (prevents CUDA OOM)
-        if len(self.current_segment) + len(audio_array) >= self.max_segment_samples:
-            logger.info(f"🔄 Force segmenting audio: current={len(self.current_segment)}, adding={len(audio_array)}, max={self.max_segment_samples}")
+        if self.segment_samples + len(audio_array) >= self.max_segment_samples:
+            logger.info(f"🔄 Force segmenting audio: current={self.segment_samples}, adding={len(audio_array)}, max={self.max_segment_samples}")
             is_end_of_segment = True
         elif has_voice:
             self.silence_counter = 0
         else:
             self.silence_counter += 1
-            if self.silence_counter >= self.silence_chunks and len(self.current_segment) > 0:
+            if self.silence_counter >= self.silence_chunks and self.segment_samples > 0:
                 is_end_of_segment = True
         
-        # Add to current segment (convert to list to maintain compatibility)
+        # Add to current segment (max-duration check above guarantees it fits)
         if not is_end_of_segment:
-            self.current_segment.extend(audio_array.tolist())
+            n = len(pcm)
+            self._seg_buf[self._seg_len:self._seg_len + n] = pcm
+            self._seg_len += n
         
         # Return current audio and segment status
         return audio_array, is_end_of_segment
@@ -126,17 +273,31 @@ class AudioProcessor:
         Get current audio segment and reset
         
         Returns:
-            Complete audio segment or None if empty
+            Complete int16 audio segment or None if empty
         """
-        if not self.current_segment:
+        if self._seg_len == 0:
             return None
         
-        segment = np.array(self.current_segment, dtype=np.float32)
-        self.current_segment = []
+        segment = self._seg_buf[:self._seg_len].copy()
+        self._seg_len = 0
         self.silence_counter = 0
         
         return segment
     
+    def peek_segment(self) -> np.ndarray:
+        """
+        Get a copy of the audio accumulated so far without resetting
+        
+        Returns:
+            Current int16 segment audio (empty if nothing buffered)
+        """
+        return self._seg_buf[:self._seg_len].copy()
+    
+    @property
+    def segment_samples(self) -> int:
+        """Number of samples in the current segment"""
+        return self._seg_len
+    
     def _resample(self, audio: np.ndarray, source_rate: int) -> np.ndarray:
         """
         Resample audio to target sample rate
@@ -159,9 +320,10 @@ class AudioProcessor:
             )
             self.last_sample_rate = source_rate
         
-        # Convert to tensor, resample, and back to numpy
-        audio_tensor = torch.from_numpy(audio).unsqueeze(0)
-        resampled = self.resampler(audio_tensor)
+        # Convert to tensor (zero-copy), resample, and back to numpy;
+        # inference_mode skips autograd tracking of the FIR convolution
+        with torch.inference_mode():
+            resampled = self.resampler(torch.from_numpy(audio).unsqueeze(0))
         
         return resampled.squeeze(0).numpy()
     
@@ -183,39 +345,53 @@ class AudioProcessor:
         
         # Noise reduction: Simple high-pass filter to remove low-frequency noise
         if len(audio_float) > 1:
-            # First-order high-pass filter (cutoff ~300Hz for 16kHz sample rate)
-            alpha = 0.95  # Coefficient for high-pass
-            filtered = np.zeros_like(audio_float)
-            filtered[0] = audio_float[0]
-            for i in range(1, len(audio_float)):
-                filtered[i] = alpha * (filtered[i-1] + audio_float[i] - audio_float[i-1])
-            audio_float = filtered
+            # First-order high-pass filter (cutoff ~300Hz for 16kHz sample rate):
+            # y[i] = alpha * (y[i-1] + x[i] - x[i-1]) with y[0] = x[0]
+            alpha = _HIGHPASS_ALPHA
+            audio_float, _ = lfilter(
+                [alpha, -alpha], [1.0, -alpha], audio_float,
+                zi=[(1.0 - alpha) * audio_float[0]]
+            )
         
-        # Enhanced energy calculation
-        rms_energy = np.sqrt(np.mean(audio_float ** 2))
+        # Enhanced energy calculation: compare the sum of squares against the
+        # squared threshold scaled by length (RMS > threshold without sqrt)
+        n = audio_float.shape[0]
+        energy_sum = float(np.dot(audio_float, audio_float))
+        if energy_sum <= (self.vad_threshold * self.vad_threshold) * n:
+            return False
         
         # Zero Crossing Rate (ZCR) for voice detection  
-        zero_crossings = 0
-        for i in range(len(audio_float) - 1):
-            if audio_float[i] * audio_float[i + 1] < 0:
-                zero_crossings += 1
-        zcr = zero_crossings / len(audio_float) if len(audio_float) > 1 else 0
+        zero_crossings = np.count_nonzero(audio_float[:-1] * audio_float[1:] < 0)
+        
+        return self._classify_voice(energy_sum, zero_crossings, n)
+    
+    def _classify_voice(self, energy_sum: float, zero_crossings: int, n: int) -> bool:
+        """
+        Voice decision from high-passed energy and zero crossing statistics
         
+        Args:
+            energy_sum: Sum of squared high-passed samples
+            zero_crossings: Number of sign changes between adjacent samples
+            n: Number of samples
+            
+        Returns:
+            True if voice activity detected
+        """
         # Voice activity if energy is above threshold AND has reasonable ZCR
         # Speech typically has ZCR between 0.01 and 0.35
-        has_voice_energy = rms_energy > self.vad_threshold
+        has_voice_energy = energy_sum > (self.vad_threshold * self.vad_threshold) * n
+        zcr = zero_crossings / n if n > 1 else 0
         has_speech_zcr = 0.01 < zcr < 0.35
         
         # For debugging - log when we detect voice
-        if has_voice_energy and has_speech_zcr:
-            logger.debug(f"🎤 Voice detected: energy={rms_energy:.4f}, zcr={zcr:.4f}")
+        if has_voice_energy and has_speech_zcr and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("🎤 Voice detected: energy=%.4f, zcr=%.4f", np.sqrt(energy_sum / n), zcr)
         
         # Return True if both conditions met (more robust VAD)
         return has_voice_energy and has_speech_zcr
     
     def reset(self):
         """Reset all buffers and counters"""
-        self.audio_buffer.clear()
-        self.current_segment = []
+        self._seg_len = 0
         self.silence_counter = 0
         logger.debug("AudioProcessor reset")
\ No newline at end of file
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Batched Inference Scheduler for WebSocket Streaming
+Coalesces audio segments from concurrent clients into single model forward passes
+"""
+
+import asyncio
+import contextlib
+import time
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+
+logger = logging.getLogger(__name__)
+
+# Batch length is rounded up to this many samples (160ms at 16kHz) so the
+# encoder sees a small set of repeating shapes and cuDNN reuses its plans
+PAD_MULTIPLE_SAMPLES = 2560
+
+# PCM16 full-scale factor applied when dequantizing on the model device
+_INT16_SCALE = 1.0 / 32768.0
+
+
+def select_amp_dtype(device: str) -> Optional[torch.dtype]:
+    """
+    Pick the mixed-precision dtype for inference on a device
+    
+    Args:
+        device: Device the model runs on
+        
+    Returns:
+        torch.bfloat16 where supported, torch.float16 on older GPUs,
+        or None on CPU (full precision)
+    """
+    if not str(device).startswith('cuda') or not torch.cuda.is_available():
+        return None
+    return torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+
+
+class BatchScheduler:
+    """
+    Micro-batches transcription requests across all WebSocket connections
+
+    Features:
+    - Shared request queue for every active connection
+    - Time-windowed batch collection (max_batch_delay_ms)
+    - Zero-padded batched forward pass via transcribe_batch
+    - Batch length rounded to a 160ms grid for cuDNN plan reuse
+    - Preallocated pinned-host/device staging buffers reused across batches
+    - Segments uploaded as int16 PCM and dequantized on the model device
+    - Dedicated copy/compute CUDA streams: the next batch uploads while
+      the current one runs
+    - Mixed-precision (bf16/fp16) autocast around the model call
+    - Per-request futures so each client awaits only its own result
+    """
+
+    def __init__(
+        self,
+        asr_model,
+        device: str = 'cuda',
+        max_batch_size: int = 16,
+        max_batch_delay_ms: float = 10.0,
+        max_segment_s: float = 30.0,
+        sample_rate: int = 16000,
+        num_staging_buffers: int = 2,
+        mixed_precision: bool = True
+    ):
+        """
+        Initialize batch scheduler
+
+        Args:
+            asr_model: Loaded model exposing transcribe_batch(wavs, wav_lens)
+            device: Device the model runs on
+            max_batch_size: Maximum number of segments per forward pass
+            max_batch_delay_ms: Time to wait for more segments after the first arrives
+            max_segment_s: Longest segment the staging buffers are sized for
+            sample_rate: Sample rate of submitted audio
+            num_staging_buffers: Number of staging buffer pairs in the pool
+            mixed_precision: Run the forward pass under bf16/fp16 autocast on CUDA
+        """
+        self.asr_model = asr_model
+        self.device = device
+        self.max_batch_size = max_batch_size
+        self.max_batch_delay_ms = max_batch_delay_ms
+        self.max_segment_samples = int(max_segment_s * sample_rate)
+        self.num_staging_buffers = num_staging_buffers
+        self.amp_dtype = select_amp_dtype(device) if mixed_precision else None
+
+        self.queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Free-list of staging buffer sets, allocated in start()
+        self._staging: Optional[asyncio.Queue] = None
+
+        # Separate copy and compute streams so uploads overlap the forward pass
+        self._copy_stream: Optional[torch.cuda.Stream] = None
+        self._compute_stream: Optional[torch.cuda.Stream] = None
+        self._compute_lock: Optional[asyncio.Lock] = None
+        self._inflight: set = set()
+
+        # Metrics
+        self.total_batches = 0
+        self.total_requests = 0
+
+        logger.info(
+            f"BatchScheduler initialized: device={device}, "
+            f"max_batch_size={max_batch_size}, max_batch_delay={max_batch_delay_ms}ms, "
+            f"amp={self.amp_dtype}"
+        )
+
+    async def start(self):
+        """Start the background batching task"""
+        if self._task is not None:
+            return
+
+        self.queue = asyncio.Queue()
+        self._compute_lock = asyncio.Lock()
+        if str(self.device).startswith('cuda'):
+            self._copy_stream = torch.cuda.Stream(device=self.device)
+            self._compute_stream = torch.cuda.Stream(device=self.device)
+        self._allocate_staging()
+        self._task = asyncio.create_task(self._run())
+        logger.info("BatchScheduler started")
+
+    def _allocate_staging(self):
+        """
+        Preallocate staging buffers sized for a full batch of maximum-length segments
+
+        Each pool entry is (host, device, wavs, lens_host, lens_device): padded
+        int16 PCM on the host and device, the float32 model input it is
+        dequantized into, and the per-segment relative lengths, so a batch
+        allocates nothing.
+
+        Host buffers are pinned when running on CUDA so uploads can use
+        non-blocking copies; on CPU the host PCM buffer doubles as the device one.
+        """
+        numel = self.max_batch_size * self.max_segment_samples
+        use_cuda = str(self.device).startswith('cuda')
+
+        self._staging = asyncio.Queue()
+        for _ in range(self.num_staging_buffers):
+            host = torch.empty(numel, dtype=torch.int16, pin_memory=use_cuda)
+            dev = torch.empty(numel, dtype=torch.int16, device=self.device) if use_cuda else host
+            wavs = torch.empty(numel, dtype=torch.float32, device=self.device)
+            lens_host = torch.empty(self.max_batch_size, dtype=torch.float32, pin_memory=use_cuda)
+            lens_dev = torch.empty(self.max_batch_size, dtype=torch.float32, device=self.device) if use_cuda else lens_host
+            self._staging.put_nowait((host, dev, wavs, lens_host, lens_dev))
+
+        logger.info(
+            f"Allocated {self.num_staging_buffers} staging buffers "
+            f"({numel * 2 / (1024**2):.1f}MB host PCM each, pinned={use_cuda})"
+        )
+
+    async def stop(self):
+        """Stop the background task and fail any pending requests"""
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        # Let batches already on the GPU finish and resolve their futures
+        await asyncio.gather(*self._inflight, return_exceptions=True)
+
+        # Fail requests that never made it into a batch
+        while not self.queue.empty():
+            _, _, future = self.queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("BatchScheduler stopped"))
+
+        logger.info("BatchScheduler stopped")
+
+    async def submit(self, client_id: str, audio: np.ndarray) -> str:
+        """
+        Queue an audio segment for batched transcription
+
+        Args:
+            client_id: Client identifier (used for logging)
+            audio: Int16 PCM (or float32 in [-1, 1]) samples at the model sample rate
+
+        Returns:
+            Raw transcription text for this segment
+        """
+        if self._task is None:
+            raise RuntimeError("BatchScheduler not started")
+
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((client_id, audio, future))
+        return await future
+
+    async def _run(self):
+        """
+        Collect requests into batches and dispatch them
+
+        A batch is dispatched as soon as a staging buffer is free, so the
+        next batch uploads while the previous one is still computing.
+        """
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await self.queue.get()]
+            try:
+                deadline = loop.time() + self.max_batch_delay_ms / 1000
+
+                # Keep collecting until the batch is full or the window closes
+                while len(batch) < self.max_batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+                staging = await self._staging.get()
+            except asyncio.CancelledError:
+                # These requests are off the queue but not yet in flight, so
+                # stop() cannot see them; fail them here
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(RuntimeError("BatchScheduler stopped"))
+                raise
+
+            task = asyncio.create_task(self._process_batch(batch, staging))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _process_batch(
+        self,
+        batch: List[Tuple[str, np.ndarray, asyncio.Future]],
+        staging: Tuple[torch.Tensor, ...]
+    ):
+        """
+        Upload one batch, run the forward pass and resolve each request's future
+
+        Args:
+            batch: List of (client_id, audio, future) tuples
+            staging: Staging buffer set checked out from the pool
+        """
+        start_time = time.time()
+        audios = [audio for _, audio, _ in batch]
+        loop = asyncio.get_running_loop()
+
+        try:
+            # Keep the event loop serving WebSocket I/O while the model runs
+            inputs = await loop.run_in_executor(None, self._upload, audios, staging)
+            async with self._compute_lock:
+                texts = await loop.run_in_executor(None, self._compute, *inputs)
+        except Exception as e:
+            logger.error(f"Batched inference failed for {len(batch)} segments: {e}")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._staging.put_nowait(staging)
+
+        for (_, _, future), text in zip(batch, texts):
+            if not future.done():
+                future.set_result(text)
+
+        self.total_batches += 1
+        self.total_requests += len(batch)
+
+        logger.debug(
+            f"Batch of {len(batch)} segments from "
+            f"{len({client_id for client_id, _, _ in batch})} clients "
+            f"transcribed in {(time.time() - start_time) * 1000:.0f}ms"
+        )
+
+    def _upload(
+        self,
+        audios: List[np.ndarray],
+        staging: Tuple[torch.Tensor, ...]
+    ) -> Tuple[torch.Tensor, torch.Tensor, Optional[torch.cuda.Event]]:
+        """
+        Pad segments into one tensor and copy it to the device on the copy stream
+
+        The upload carries int16 PCM, half the bytes of float32; a single
+        scale kernel on the device produces the float32 model input.
+
+        Args:
+            audios: Audio segments of varying length
+            staging: Staging buffer set checked out from the pool
+
+        Returns:
+            (wavs, wav_lens, ready) where ready is the copy-stream event the
+            compute stream must wait on (None on CPU)
+        """
+        lengths = [len(audio) for audio in audios]
+        max_len = max(max(lengths), 1)
+        max_len = -(-max_len // PAD_MULTIPLE_SAMPLES) * PAD_MULTIPLE_SAMPLES
+        if max(lengths) <= self.max_segment_samples:
+            max_len = min(max_len, self.max_segment_samples)
+        numel = len(audios) * max_len
+        host, dev, wavs_buf, lens_host, lens_dev = staging
+
+        if max_len > self.max_segment_samples:
+            # Oversized segment: fall back to a one-off allocation
+            logger.warning(f"Segment of {max_len} samples exceeds staging size {self.max_segment_samples}")
+            host = torch.empty(numel, dtype=torch.int16, pin_memory=self._copy_stream is not None)
+            dev = None
+            wavs_buf = None
+
+        # Zero-pad to the longest segment in a contiguous [batch, max_len] view
+        pcm_host = host[:numel].view(len(audios), max_len)
+        for i, audio in enumerate(audios):
+            src = torch.from_numpy(audio)
+            if src.dtype != torch.int16:
+                # Float input: quantize onto the PCM16 grid
+                src = (src * 32768.0).round_().clamp_(-32768, 32767)
+            pcm_host[i, :len(audio)] = src
+            pcm_host[i, len(audio):] = 0
+
+        # SpeechBrain uses relative lengths
+        wav_lens_host = lens_host[:len(audios)]
+        for i, length in enumerate(lengths):
+            wav_lens_host[i] = length / max_len
+
+        if self._copy_stream is None:
+            if wavs_buf is None:
+                wavs = pcm_host.to(torch.float32).mul_(_INT16_SCALE)
+            else:
+                wavs = torch.mul(pcm_host, _INT16_SCALE, out=wavs_buf[:numel].view(len(audios), max_len))
+            return wavs, wav_lens_host, None
+
+        with torch.cuda.stream(self._copy_stream):
+            if dev is None:
+                pcm = pcm_host.to(self.device, non_blocking=True)
+                wavs = pcm.to(torch.float32).mul_(_INT16_SCALE)
+                wavs.record_stream(self._compute_stream)
+            else:
+                pcm = dev[:numel].view(len(audios), max_len)
+                pcm.copy_(pcm_host, non_blocking=True)
+                # Dequantize in one int16 -> float32 scale kernel
+                wavs = torch.mul(pcm, _INT16_SCALE, out=wavs_buf[:numel].view(len(audios), max_len))
+            wav_lens = lens_dev[:len(audios)]
+            wav_lens.copy_(wav_lens_host, non_blocking=True)
+            ready = self._copy_stream.record_event()
+
+        return wavs, wav_lens, ready
+
+    def _compute(
+        self,
+        wavs: torch.Tensor,
+        wav_lens: torch.Tensor,
+        ready: Optional[torch.cuda.Event]
+    ) -> List[str]:
+        """
+        Run the model once on an uploaded batch
+
+        A batch mixes segments from several connections in one forward pass,
+        so it runs on the scheduler's single compute stream.
+
+        Args:
+            wavs: Padded [batch, time] audio on the model device
+            wav_lens: Relative lengths per segment
+            ready: Copy-stream event to wait on before computing (None on CPU)
+
+        Returns:
+            Transcription text per segment, in input order
+        """
+        if ready is None:
+            with torch.inference_mode(), self._autocast():
+                predictions = self.asr_model.transcribe_batch(wavs, wav_lens)
+        else:
+            # Only this batch's upload gates the compute stream
+            self._compute_stream.wait_event(ready)
+            with torch.cuda.stream(self._compute_stream), torch.inference_mode(), self._autocast():
+                predictions = self.asr_model.transcribe_batch(wavs, wav_lens)
+
+        # EncoderDecoderASR returns (predicted_words, predicted_tokens)
+        if isinstance(predictions, tuple):
+            predictions = predictions[0]
+
+        return [str(text) for text in predictions]
+
+    def _autocast(self):
+        """Autocast context for the forward pass (no-op at full precision)"""
+        if self.amp_dtype is None:
+            return contextlib.nullcontext()
+        return torch.autocast(device_type='cuda', dtype=self.amp_dtype)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get scheduler metrics
+
+        Returns:
+            Dict with metrics
+        """
+        return {
+            'running': self._task is not None,
+            'queued': self.queue.qsize() if self.queue else 0,
+            'total_batches': self.total_batches,
+            'total_requests': self.total_requests,
+            'avg_batch_size': round(self.total_requests / self.total_batches, 2) if self.total_batches else 0.0,
+            'max_batch_size': self.max_batch_size,
+            'max_batch_delay_ms': self.max_batch_delay_ms
+        }
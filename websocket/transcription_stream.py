@@ -1,60 +1,150 @@
 #!/usr/bin/env python3
 """
-Streaming Transcription Handler with Riva ASR
+Streaming Transcription Handler
 Manages continuous transcription with partial results using NVIDIA Riva
+or a local SpeechBrain model
 """
 
 import asyncio
+import contextlib
+import hashlib
 import time
 import numpy as np
-from typing import Optional, Dict, Any, AsyncGenerator
-from datetime import datetime
+import torch
+from typing import Optional, Dict, Any, Hashable, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass
 import logging
 import sys
 import os
+import re
 
 # Add src directory to path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))  
-from src.asr import RivaASRClient
+from src.asr import RivaASRClient, utc_isoformat
+from .batch_scheduler import select_amp_dtype
 
 logger = logging.getLogger(__name__)
 
+# Serializes direct-path inference across all streams sharing the GPU
+# (created lazily so it binds to the running event loop)
+_GPU_SEM: Optional[asyncio.Semaphore] = None
+
+# (device, max_samples) -> (host PCM, device PCM, device float32, copy stream,
+# compute stream) shared by every direct-path stream; only used under _GPU_SEM
+_DIRECT_STAGING: Dict[Tuple[str, int], Tuple[Any, ...]] = {}
+
+# Local-model transcripts of short, byte-identical segments (silence,
+# "yes", "stop", wake words) are served from a per-stream LRU cache
+TEXT_CACHE_SIZE = 256
+TEXT_CACHE_MAX_S = 2.0
+
+# Full-scale factor for int16 PCM segments
+_INT16_SCALE = np.float32(1.0 / 32768.0)
+
+# Direct-path placeholder text for a failed forward pass (never cached)
+TRANSCRIPTION_ERROR_TEXT = "[transcription error]"
+
+# First character after a sentence ending, for post-processing
+_SENTENCE_START = re.compile(r'([.!?]\s*)(\w)')
+
+
+def _capitalize_sentence_start(match: re.Match) -> str:
+    """Upper-case the character matched by _SENTENCE_START"""
+    return match.group(1) + match.group(2).upper()
+
+
+@dataclass(slots=True)
+class Word:
+    """Word timing entry of a local-model result (encoded by orjson as an object)"""
+    word: str
+    start: float
+    end: float
+    confidence: float = 0.95  # Placeholder; SpeechBrain gives no word confidence
+
 
 class TranscriptionStream:
     """
-    Manages streaming transcription with NVIDIA Riva ASR
+    Manages streaming transcription with NVIDIA Riva ASR or a local model
     
     Features:
     - Partial result generation via Riva streaming
     - Word-level timing alignment from Riva
     - Confidence scoring from Riva models
     - Remote GPU processing via gRPC
+    - Local inference batched across clients (BatchScheduler) or run
+      directly in-memory on the model
+    - Silence gating and a short-utterance transcript cache
     """
     
-    def __init__(self, asr_model=None, device: str = 'cuda'):
+    def __init__(
+        self,
+        asr_model=None,
+        device: str = 'cuda',
+        batch_scheduler=None,
+        client_id: Optional[str] = None,
+        max_segment_s: float = 30.0,
+        sample_rate: int = 16000,
+        mixed_precision: bool = True,
+        silence_threshold: float = 1e-3
+    ):
         """
-        Initialize transcription stream with Riva client
+        Initialize transcription stream with a Riva client or local model
         
         Args:
-            asr_model: Ignored (kept for compatibility)
-            device: Ignored (Riva handles device management)
+            asr_model: Optional local SpeechBrain model; when provided without a
+                batch scheduler, segments are transcribed in-memory on this model
+            device: Device the local model runs on (ignored for Riva)
+            batch_scheduler: Optional BatchScheduler for local model inference;
+                when provided, segments are batched with other clients' segments
+                on the local GPU instead of being streamed to Riva
+            client_id: Client identifier used to tag batched requests
+            max_segment_s: Longest segment served from the preallocated
+                staging buffers of the direct path
+            sample_rate: Sample rate the staging buffers are sized for
+            mixed_precision: Run direct-path inference under bf16/fp16
+                autocast on CUDA
+            silence_threshold: RMS level (full scale = 1.0) below which a
+                segment is returned empty without running inference
         """
-        # Initialize Riva client instead of local model
-        # Use real Riva service now that it's running
-        self.riva_client = RivaASRClient(mock_mode=False)
+        self.asr_model = asr_model
+        self.device = device
+        self.batch_scheduler = batch_scheduler
+        self.client_id = client_id
         self.connected = False
+        self.silence_threshold = silence_threshold
         
-        # Note: device parameter ignored as Riva runs on remote GPU
-        logger.info("Initializing TranscriptionStream with Riva ASR client")
+        if batch_scheduler is not None:
+            logger.info("Initializing TranscriptionStream with local batched inference")
+        elif asr_model is not None:
+            # Bound once so the hot path skips the attribute lookup
+            self._transcribe_fn = asr_model.transcribe_batch
+            # transcribe_batch moves inputs to the model's own device, so
+            # upload there (or not at all) rather than to the requested one
+            self.device = str(getattr(asr_model, 'device', device))
+            self.amp_dtype = select_amp_dtype(self.device) if mixed_precision else None
+            self._allocate_staging(int(max_segment_s * sample_rate))
+            logger.info("Initializing TranscriptionStream with direct local inference")
+        else:
+            # Initialize Riva client instead of local model
+            # Use real Riva service now that it's running
+            self.riva_client = RivaASRClient(mock_mode=False)
+            
+            # Note: device parameter ignored as Riva runs on remote GPU
+            logger.info("Initializing TranscriptionStream with Riva ASR client")
+        
+        # Audio hash -> local-model transcript, least recently used first
+        self._text_cache: OrderedDict = OrderedDict()
         
         # Transcription state
         self.segment_id = 0
         self.partial_transcript = ""
+        self._partial_samples = 0  # Segment length partial_transcript was decoded from
         self.final_transcripts = []
-        self.word_timings = []
+        self._joined_finals = ""  # ' '.join(final_transcripts), kept incrementally
         self.current_time_offset = 0.0
         
-        logger.info(f"TranscriptionStream initialized on {device}")
+        logger.info(f"TranscriptionStream initialized on {self.device}")
     
     async def transcribe_segment(
         self,
@@ -63,7 +153,7 @@ class TranscriptionStream:
         is_final: bool = False
     ) -> Dict[str, Any]:
         """
-        Transcribe audio segment using Riva ASR
+        Transcribe audio segment using Riva ASR or the local batched model
         
         Args:
             audio_segment: Audio array to transcribe
@@ -76,142 +166,404 @@ class TranscriptionStream:
         start_time = time.time()
         
         try:
-            # Ensure connected to Riva
-            if not self.connected:
-                self.connected = await self.riva_client.connect()
-                if not self.connected:
-                    return self._error_result("Failed to connect to Riva ASR server")
-            
             # Get audio duration
             duration = len(audio_segment) / sample_rate
             
-            # Create audio generator for streaming
-            async def audio_generator():
-                # Convert numpy array to bytes (int16 format)
-                if audio_segment.dtype != np.int16:
-                    audio_int16 = (audio_segment * 32767).astype(np.int16)
-                else:
-                    audio_int16 = audio_segment
-                
-                # Yield entire segment as one chunk for offline-style processing
-                yield audio_int16.tobytes()
-            
-            # Stream to Riva and collect results
-            result = None
-            async for event in self.riva_client.stream_transcribe(
-                audio_generator(),
-                sample_rate=sample_rate,
-                enable_partials=not is_final
-            ):
-                # Use the last event as result
-                result = event
-                
-                # For partial results, update state immediately
-                if not is_final and event.get('type') == 'partial':
-                    self.partial_transcript = event.get('text', '')
-            
-            # If no result, create empty result
-            if result is None:
-                result = {
-                    'type': 'transcription',
-                    'segment_id': self.segment_id,
-                    'text': '',
-                    'is_final': is_final,
-                    'words': [],
-                    'duration': round(duration, 3),
-                    'timestamp': datetime.utcnow().isoformat()
-                }
+            # Silent segments never reach the model
+            if self._is_silent(audio_segment):
+                logger.debug("Skipping inference on silent %.2fs segment", duration)
+                result = self._process_transcription("", duration, is_final, start_time)
+                backend = None
+            elif is_final and self._partial_covers(audio_segment):
+                # No audio arrived after the last partial (e.g. on stop_recording)
+                logger.debug("Reusing partial transcript for %.2fs final segment", duration)
+                result = self._process_transcription(self.partial_transcript, duration, is_final, start_time)
+                backend = None
+            elif self.batch_scheduler is not None:
+                result = await self._transcribe_local(audio_segment, duration, is_final, start_time)
+                backend = "Local"
+            elif self.asr_model is not None:
+                result = await self._transcribe_direct(audio_segment, sample_rate, duration, is_final, start_time)
+                backend = "Direct"
             else:
-                # Ensure result has all required fields
-                result['duration'] = round(duration, 3)
-                result['is_final'] = is_final
-                result['segment_id'] = self.segment_id
+                result = await self._transcribe_riva(audio_segment, sample_rate, duration, is_final)
+                backend = "Riva"
             
             # Performance logging
-            processing_time_s = (time.time() - start_time)
-            rtf = processing_time_s / duration if duration > 0 else 0
-            logger.info(f"🚀 Riva Performance: RTF={rtf:.2f}, {processing_time_s*1000:.0f}ms for {duration:.2f}s audio")
+            if backend is not None:
+                processing_time_s = (time.time() - start_time)
+                rtf = processing_time_s / duration if duration > 0 else 0
+                logger.info(f"🚀 {backend} Performance: RTF={rtf:.2f}, {processing_time_s*1000:.0f}ms for {duration:.2f}s audio")
             
             # Update state
-            if is_final and result.get('text'):
-                self.final_transcripts.append(result['text'])
-                self.current_time_offset += duration
-                self.segment_id += 1
-            elif not is_final:
+            if is_final:
+                if result.get('text'):
+                    self.final_transcripts.append(result['text'])
+                    self._joined_finals = (
+                        f"{self._joined_finals} {result['text']}" if self._joined_finals else result['text']
+                    )
+                    self.current_time_offset += duration
+                    self.segment_id += 1
+                # The partial belonged to this segment and is now superseded
+                self.partial_transcript = ""
+                self._partial_samples = 0
+            else:
                 self.partial_transcript = result.get('text', '')
+                self._partial_samples = len(audio_segment)
             
             return result
             
         except Exception as e:
-            logger.error(f"Riva transcription error: {e}")
+            logger.error(f"Transcription error: {e}")
             return self._error_result(str(e))
     
-    def _run_inference_legacy(self, audio_tensor, sample_rate: int) -> str:
+    def _is_silent(self, audio_segment: np.ndarray) -> bool:
+        """
+        Check whether a segment's RMS level is below the silence threshold
+        
+        Args:
+            audio_segment: Audio array (float in [-1, 1] or int16 PCM)
+            
+        Returns:
+            True if the segment is empty or silent
+        """
+        if audio_segment.size == 0:
+            return True
+        
+        audio = audio_segment.ravel()
+        if audio.dtype == np.int16:
+            audio = audio * _INT16_SCALE
+        
+        # Single BLAS dot product, no x**2 temporary
+        rms = np.sqrt(np.dot(audio, audio) / audio.size)
+        return rms < self.silence_threshold
+    
+    async def _transcribe_local(
+        self,
+        audio_segment: np.ndarray,
+        duration: float,
+        is_final: bool,
+        start_time: float
+    ) -> Dict[str, Any]:
+        """
+        Transcribe audio segment with the local model via the batch scheduler
+        
+        Args:
+            audio_segment: Audio array to transcribe
+            duration: Audio duration in seconds
+            is_final: Whether this is the final segment
+            start_time: Processing start time
+            
+        Returns:
+            Transcription result dictionary
+        """
+        cache_key = self._cache_key(audio_segment, duration)
+        text = self._cached_text(cache_key)
+        if text is None:
+            text = await self.batch_scheduler.submit(self.client_id, audio_segment)
+            text = self._post_process_transcription(text)
+            self._cache_text(cache_key, text)
+        return self._process_transcription(text, duration, is_final, start_time)
+    
+    async def _transcribe_direct(
+        self,
+        audio_segment: np.ndarray,
+        sample_rate: int,
+        duration: float,
+        is_final: bool,
+        start_time: float
+    ) -> Dict[str, Any]:
+        """
+        Transcribe audio segment in-memory on the local model
+        
+        Args:
+            audio_segment: Audio array to transcribe
+            sample_rate: Sample rate of audio
+            duration: Audio duration in seconds
+            is_final: Whether this is the final segment
+            start_time: Processing start time
+            
+        Returns:
+            Transcription result dictionary
+        """
+        cache_key = self._cache_key(audio_segment, duration)
+        text = self._cached_text(cache_key)
+        if text is not None:
+            return self._process_transcription(text, duration, is_final, start_time)
+        
+        global _GPU_SEM
+        if _GPU_SEM is None:
+            _GPU_SEM = asyncio.Semaphore(1)
+        
+        loop = asyncio.get_running_loop()
+        async with _GPU_SEM:
+            # Run CUDA work off the event loop so WebSocket I/O keeps flowing
+            text = await loop.run_in_executor(None, self._infer_segment, audio_segment, sample_rate)
+        
+        if text != TRANSCRIPTION_ERROR_TEXT:
+            self._cache_text(cache_key, text)
+        return self._process_transcription(text, duration, is_final, start_time)
+    
+    def _partial_covers(self, audio_segment: np.ndarray) -> bool:
+        """
+        Check whether the latest partial was decoded from exactly this segment
+        
+        Partials are snapshots of the segment still being recorded and the
+        final is that same buffer, so a matching length means identical
+        audio. Only the local backends qualify, since their partial and
+        final passes are the same model call.
+        
+        Args:
+            audio_segment: Final segment about to be transcribed
+            
+        Returns:
+            True if partial_transcript can stand in for the final transcript
+        """
+        return (
+            (self.batch_scheduler is not None or self.asr_model is not None)
+            and self._partial_samples > 0
+            and self._partial_samples == len(audio_segment)
+            and self.partial_transcript != TRANSCRIPTION_ERROR_TEXT
+        )
+    
+    def _cache_key(self, audio_segment: np.ndarray, duration: float) -> Optional[Hashable]:
+        """
+        Build the transcript cache key for a segment
+        
+        Args:
+            audio_segment: Audio array to transcribe
+            duration: Audio duration in seconds
+            
+        Returns:
+            Digest of the samples, or None for segments too long to cache
+        """
+        if duration >= TEXT_CACHE_MAX_S:
+            return None
+        audio = np.ascontiguousarray(audio_segment)
+        return (audio.dtype.str, hashlib.blake2b(audio, digest_size=16).digest())
+    
+    def _cached_text(self, key: Optional[Hashable]) -> Optional[str]:
+        """
+        Look up a cached transcript and mark it most recently used
+        
+        Args:
+            key: Cache key from _cache_key
+            
+        Returns:
+            Cached transcript, or None on a miss
+        """
+        if key is None:
+            return None
+        text = self._text_cache.get(key)
+        if text is not None:
+            self._text_cache.move_to_end(key)
+        return text
+    
+    def _cache_text(self, key: Optional[Hashable], text: str):
+        """
+        Store a transcript, evicting the least recently used entry when full
+        
+        Args:
+            key: Cache key from _cache_key
+            text: Post-processed transcript
+        """
+        if key is None:
+            return
+        self._text_cache[key] = text
+        if len(self._text_cache) > TEXT_CACHE_SIZE:
+            self._text_cache.popitem(last=False)
+    
+    async def _transcribe_riva(
+        self,
+        audio_segment: np.ndarray,
+        sample_rate: int,
+        duration: float,
+        is_final: bool
+    ) -> Dict[str, Any]:
+        """
+        Transcribe audio segment by streaming it to Riva
+        
+        Args:
+            audio_segment: Audio array to transcribe
+            sample_rate: Sample rate of audio
+            duration: Audio duration in seconds
+            is_final: Whether this is the final segment
+            
+        Returns:
+            Transcription result dictionary
+        """
+        # Ensure connected to Riva
+        if not self.connected:
+            self.connected = await self.riva_client.connect()
+            if not self.connected:
+                raise ConnectionError("Failed to connect to Riva ASR server")
+        
+        # Create audio generator for streaming
+        async def audio_generator():
+            # Convert numpy array to bytes (int16 format)
+            if audio_segment.dtype != np.int16:
+                audio_int16 = (audio_segment * 32767).astype(np.int16)
+            else:
+                audio_int16 = audio_segment
+            
+            # Yield entire segment as one chunk for offline-style processing
+            yield audio_int16.tobytes()
+        
+        # Stream to Riva and collect results
+        result = None
+        async for event in self.riva_client.stream_transcribe(
+            audio_generator(),
+            sample_rate=sample_rate,
+            enable_partials=not is_final
+        ):
+            # Use the last event as result
+            result = event
+            
+            # For partial results, update state immediately
+            if not is_final and event.get('type') == 'partial':
+                self.partial_transcript = event.get('text', '')
+        
+        # If no result, create empty result
+        if result is None:
+            result = {
+                'type': 'transcription',
+                'segment_id': self.segment_id,
+                'text': '',
+                'is_final': is_final,
+                'words': [],
+                'duration': round(duration, 3),
+                'timestamp': utc_isoformat()
+            }
+        else:
+            # Ensure result has all required fields
+            result['duration'] = round(duration, 3)
+            result['is_final'] = is_final
+            result['segment_id'] = self.segment_id
+        
+        return result
+    
+    def _allocate_staging(self, max_samples: int):
         """
-        Run RNN-T inference on audio tensor
+        Attach the pinned host and device buffers for the direct path
+        
+        _GPU_SEM already runs one direct-path inference at a time, so every
+        stream shares one buffer set and one copy/compute CUDA stream pair
+        per device, allocated by the first connection. Batched segments run
+        on the BatchScheduler's own streams instead.
         
         Args:
-            audio_tensor: Input audio tensor
+            max_samples: Capacity of the buffers in samples
+        """
+        self._host_buf = None
+        self._dev_pcm = None
+        self._dev_buf = None
+        self._copy_stream = None
+        self._compute_stream = None
+        
+        if not self.device.startswith('cuda') or not torch.cuda.is_available():
+            return
+        
+        key = (self.device, max_samples)
+        staging = _DIRECT_STAGING.get(key)
+        if staging is None:
+            staging = (
+                torch.empty(max_samples, dtype=torch.int16, pin_memory=True),
+                torch.empty(max_samples, dtype=torch.int16, device=self.device),
+                torch.empty(max_samples, dtype=torch.float32, device=self.device),
+                torch.cuda.Stream(device=self.device),
+                torch.cuda.Stream(device=self.device)
+            )
+            _DIRECT_STAGING[key] = staging
+        
+        (self._host_buf, self._dev_pcm, self._dev_buf,
+         self._copy_stream, self._compute_stream) = staging
+    
+    def _upload(self, audio_segment: np.ndarray) -> torch.Tensor:
+        """
+        Move a segment to the model device as a [1, T] float32 tensor
+        
+        On CUDA int16 segments are staged through the pinned buffer, copied
+        asynchronously on a dedicated stream into a persistent device buffer,
+        and dequantized there on the compute stream, so only half the bytes
+        of float32 cross the bus.
+        
+        Args:
+            audio_segment: Audio array to upload (int16 PCM or float32)
+            
+        Returns:
+            Audio tensor on the model device
+        """
+        n = audio_segment.shape[0]
+        
+        if audio_segment.dtype != np.int16 or self._dev_buf is None or n > self._dev_buf.shape[0]:
+            # Float input, CPU model or segment longer than the staging buffers
+            audio = np.ascontiguousarray(audio_segment)
+            if audio.dtype == np.int16:
+                audio = audio * _INT16_SCALE
+            audio = torch.from_numpy(np.ascontiguousarray(audio, dtype=np.float32)).unsqueeze(0)
+            return audio if self._dev_buf is None else audio.to(self.device)
+        
+        self._host_buf[:n].copy_(torch.from_numpy(np.ascontiguousarray(audio_segment)))
+        with torch.cuda.stream(self._copy_stream):
+            self._dev_pcm[:n].copy_(self._host_buf[:n], non_blocking=True)
+        torch.cuda.current_stream().wait_stream(self._copy_stream)
+        torch.mul(self._dev_pcm[:n], _INT16_SCALE, out=self._dev_buf[:n])
+        return self._dev_buf[:n].unsqueeze(0)
+    
+    def _infer_segment(self, audio_segment: np.ndarray, sample_rate: int) -> str:
+        """
+        Upload a segment and run inference on it (executor thread)
+        
+        Called with _GPU_SEM held, which guards the shared staging buffers.
+        The current CUDA stream is thread-local, so the compute stream is
+        entered here rather than around the executor call. Decoding ends in
+        host-side text, which already waits for the stream to drain before
+        the staging buffers are reused.
+        
+        Args:
+            audio_segment: Audio array to transcribe
+            sample_rate: Sample rate of audio
+            
+        Returns:
+            Transcribed text
+        """
+        if self._compute_stream is None:
+            audio_tensor = self._upload(audio_segment)
+            return self._run_inference(audio_tensor, sample_rate)
+        
+        with torch.cuda.stream(self._compute_stream):
+            audio_tensor = self._upload(audio_segment)
+            return self._run_inference(audio_tensor, sample_rate)
+    
+    def _run_inference(self, audio_tensor: torch.Tensor, sample_rate: int) -> str:
+        """
+        Run RNN-T inference on an audio tensor already on the model device
+        
+        The tensor is fed straight to transcribe_batch with a full-length
+        relative wav_lens, so no WAV file is written or re-decoded.
+        
+        Args:
+            audio_tensor: Input audio tensor, [1, T] float32
             sample_rate: Sample rate
             
         Returns:
             Transcribed text
         """
         try:
-            # Ensure we have proper tensor shape
-            if not isinstance(audio_tensor, torch.Tensor):
-                audio_tensor = torch.tensor(audio_tensor, dtype=torch.float32)
-            
-            # Get audio duration for logging
-            if hasattr(audio_tensor, 'shape'):
-                if len(audio_tensor.shape) == 1:
-                    num_samples = audio_tensor.shape[0]
-                elif len(audio_tensor.shape) == 2:
-                    num_samples = audio_tensor.shape[1]
-                else:
-                    num_samples = audio_tensor.numel()
-            else:
-                num_samples = len(audio_tensor) if hasattr(audio_tensor, '__len__') else 0
-            
-            duration_seconds = num_samples / sample_rate
-            logger.info(f"🎤 Processing {duration_seconds:.2f}s audio segment")
-            
-            # Prepare audio tensor for SpeechBrain model
-            # Model expects [batch, time] or [batch, time, channels]
-            if audio_tensor.dim() == 1:
-                # Add batch dimension
-                audio_tensor = audio_tensor.unsqueeze(0)
-            elif audio_tensor.dim() == 3 and audio_tensor.shape[0] == 1:
-                # Already has batch dimension
-                pass
-            else:
-                # Ensure proper shape
+            if audio_tensor.dim() != 2:
                 audio_tensor = audio_tensor.reshape(1, -1)
             
-            # Move to device
-            if self.device == 'cuda':
-                audio_tensor = audio_tensor.cuda()
-            
-            # Save audio to temporary file and transcribe
-            # SpeechBrain models work better with file input
-            import tempfile
-            import soundfile as sf
+            logger.debug("🎤 Processing %.2fs audio segment", audio_tensor.shape[1] / sample_rate)
             
-            # Convert tensor to numpy for saving
-            if audio_tensor.dim() > 1:
-                audio_numpy = audio_tensor.squeeze(0).cpu().numpy()
-            else:
-                audio_numpy = audio_tensor.cpu().numpy()
+            # SpeechBrain lengths are relative to the longest item in the batch
+            wav_lens = torch.ones(1, device=audio_tensor.device)
             
-            logger.info(f"Saving audio to temp file for transcription ({len(audio_numpy)} samples)")
+            with torch.inference_mode(), self._autocast():
+                predictions = self._transcribe_fn(audio_tensor, wav_lens)
             
-            # Create temporary WAV file
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=True) as temp_file:
-                sf.write(temp_file.name, audio_numpy, sample_rate)
-                
-                # Transcribe using the model
-                with torch.no_grad():
-                    predictions = self.asr_model.transcribe_file(temp_file.name)
+            # transcribe_batch returns (words, tokens)
+            if isinstance(predictions, tuple):
+                predictions = predictions[0]
             
             # Extract text from predictions
             if isinstance(predictions, list):
@@ -223,23 +575,19 @@ class TranscriptionStream:
             processed_result = self._post_process_transcription(result)
             logger.info(f"✅ Transcribed: '{result}' -> '{processed_result}'")
             
-            # Optimization: More aggressive CUDA memory cleanup
-            if self.device == 'cuda':
-                torch.cuda.empty_cache()
-                # Force garbage collection for better memory management
-                import gc
-                gc.collect()
-            
             return processed_result
             
         except Exception as e:
             logger.error(f"Transcription error: {e}")
             
             # Fallback for error cases
-            return "[transcription error]"
-            
-            # Return simple placeholder
-            return "transcription error - check logs"
+            return TRANSCRIPTION_ERROR_TEXT
+    
+    def _autocast(self):
+        """Autocast context for the forward pass (no-op at full precision)"""
+        if self.amp_dtype is None:
+            return contextlib.nullcontext()
+        return torch.autocast(device_type='cuda', dtype=self.amp_dtype)
     
     def _post_process_transcription(self, text: str) -> str:
         """
@@ -255,7 +603,7 @@ class TranscriptionStream:
             return text
             
         # Convert from all caps to proper capitalization
-        processed = text.lower()
+        processed = text.strip().lower()
         
         # Capitalize first letter of sentence
         if processed:
@@ -269,19 +617,7 @@ class TranscriptionStream:
                 processed += '.'
         
         # Capitalize after sentence endings
-        import re
-        sentences = re.split(r'([.!?]\s*)', processed)
-        capitalized_sentences = []
-        for i, sentence in enumerate(sentences):
-            if i % 2 == 0 and sentence.strip():  # Even indices are sentence content
-                sentence = sentence.strip()
-                if sentence:
-                    sentence = sentence[0].upper() + sentence[1:] if len(sentence) > 1 else sentence.upper()
-                capitalized_sentences.append(sentence)
-            else:
-                capitalized_sentences.append(sentence)
-        
-        processed = ''.join(capitalized_sentences)
+        processed = _SENTENCE_START.sub(_capitalize_sentence_start, processed)
         
         return processed
     
@@ -306,22 +642,17 @@ class TranscriptionStream:
         """
         processing_time = (time.time() - start_time) * 1000
         
-        # Generate word timings
+        # Generate word timings (finals only; partials are superseded)
         words = []
-        if text:
-            word_list = text.strip().split()
-            if word_list:
-                time_per_word = duration / len(word_list) if len(word_list) > 0 else 0
-                current_time = self.current_time_offset
-                
-                for word in word_list:
-                    words.append({
-                        'word': word,
-                        'start': round(current_time, 3),
-                        'end': round(current_time + time_per_word, 3),
-                        'confidence': 0.95  # Placeholder
-                    })
-                    current_time += time_per_word
+        word_list = text.split() if is_final and text else None
+        if word_list:
+            n = len(word_list)
+            time_per_word = duration / n
+            starts = self.current_time_offset + np.arange(n) * time_per_word
+            ends = np.round(starts + time_per_word, 3).tolist()
+            starts = np.round(starts, 3).tolist()
+            
+            words = [Word(word, start, end) for word, start, end in zip(word_list, starts, ends)]
         
         return {
             'type': 'transcription',
@@ -331,7 +662,7 @@ class TranscriptionStream:
             'words': words,
             'duration': round(duration, 3),
             'processing_time_ms': round(processing_time, 2),
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': utc_isoformat()
         }
     
     def _error_result(self, error_message: str) -> Dict[str, Any]:
@@ -348,7 +679,7 @@ class TranscriptionStream:
             'type': 'error',
             'error': error_message,
             'segment_id': self.segment_id,
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': utc_isoformat()
         }
     
     def get_full_transcript(self) -> str:
@@ -358,7 +689,7 @@ class TranscriptionStream:
         Returns:
             Full transcript text
         """
-        full_text = ' '.join(self.final_transcripts)
+        full_text = self._joined_finals
         if self.partial_transcript:
             full_text += ' ' + self.partial_transcript
         return full_text.strip()
@@ -367,8 +698,9 @@ class TranscriptionStream:
         """Reset transcription state"""
         self.segment_id = 0
         self.partial_transcript = ""
+        self._partial_samples = 0
         self.final_transcripts = []
-        self.word_timings = []
+        self._joined_finals = ""
         self.current_time_offset = 0.0
         # Reset Riva client segment counter
         if hasattr(self, 'riva_client'):
@@ -4,20 +4,56 @@ WebSocket Handler for Real-time Audio Streaming
 Manages WebSocket connections and message routing
 """
 
-import json
 import asyncio
-from typing import Dict, Any, Optional, Union
+import time
+import orjson
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Union
 from fastapi import WebSocket, WebSocketDisconnect
 import logging
-from datetime import datetime
+import sys
+import os
 import torch
-import numpy as np
 
 from .audio_processor import AudioProcessor
 from .transcription_stream import TranscriptionStream
+from .batch_scheduler import BatchScheduler
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from src.asr import utc_isoformat
 
 logger = logging.getLogger(__name__)
 
+# Segments waiting for transcription per connection before ingest backs off
+SEGMENT_QUEUE_SIZE = 8
+
+# A partial is only queued once this much new audio has arrived since the
+# last one, and no sooner than this after it (bursty/faster-than-real-time
+# senders would otherwise get a partial per burst)
+PARTIAL_MIN_NEW_SAMPLES = 16000  # 1s at 16kHz
+PARTIAL_MIN_INTERVAL_S = 0.4
+
+
+@dataclass(slots=True)
+class ConnectionState:
+    """Per-connection processing state"""
+    audio_processor: AudioProcessor
+    transcription_stream: TranscriptionStream
+    connected_at: str
+    total_audio_duration: float = 0.0
+    total_segments: int = 0
+    is_recording: bool = False
+    # (segment, is_final) pairs consumed by the transcription worker
+    segment_queue: asyncio.Queue = field(
+        default_factory=lambda: asyncio.Queue(maxsize=SEGMENT_QUEUE_SIZE)
+    )
+    partial_queued: bool = False
+    # Segment length and monotonic time when the last partial was queued
+    last_partial_samples: int = 0
+    last_partial_at: float = 0.0
+    worker: Optional[asyncio.Task] = None
+
 
 class WebSocketHandler:
     """
@@ -28,20 +64,93 @@ class WebSocketHandler:
     - Message routing and validation
     - Error handling and recovery
     - Client state management
+    - Per-connection transcription worker decoupled from audio ingest
     """
     
-    def __init__(self, asr_model):
+    def __init__(self, asr_model, batch_scheduler=None, use_batching: bool = True):
         """
         Initialize WebSocket handler
         
         Args:
             asr_model: Loaded RNN-T model for transcription
+            batch_scheduler: Optional BatchScheduler shared by all connections
+                for batched local inference; one is created for asr_model when
+                omitted (Riva is used when neither is given)
+            use_batching: Create a BatchScheduler for asr_model when none is
+                given. With False each connection runs asr_model directly,
+                one segment per forward pass
         """
         self.asr_model = asr_model
+        self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        
+        # Segments from concurrent connections share one forward pass
+        self._owns_scheduler = batch_scheduler is None and asr_model is not None and use_batching
+        if self._owns_scheduler:
+            batch_scheduler = BatchScheduler(asr_model, device=self.device)
+        self.batch_scheduler = batch_scheduler
         self.active_connections: Dict[str, WebSocket] = {}
-        self.connection_states: Dict[str, Dict] = {}
+        self.connection_states: Dict[str, ConnectionState] = {}
+        
+        loop_name = self._event_loop_name()
+        logger.info(f"WebSocketHandler initialized (event loop: {loop_name})")
+        if 'uvloop' not in loop_name:
+            logger.info("ℹ️ Run the server with uvicorn --loop uvloop for faster socket I/O")
+    
+    @staticmethod
+    def _event_loop_name() -> str:
+        """
+        Describe the running event loop implementation
         
-        logger.info("WebSocketHandler initialized")
+        Returns:
+            Qualified class name of the running loop, or 'not running'
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return 'not running'
+        return f"{type(loop).__module__}.{type(loop).__name__}"
+    
+    def _create_client_state(self, client_id: str) -> ConnectionState:
+        """
+        Create per-client processing state
+        
+        Args:
+            client_id: Unique client identifier
+            
+        Returns:
+            Client connection state
+        """
+        return ConnectionState(
+            audio_processor=AudioProcessor(max_segment_duration_s=5.0),
+            transcription_stream=TranscriptionStream(
+                self.asr_model,
+                device=self.device,
+                batch_scheduler=self.batch_scheduler,
+                client_id=client_id
+            ),
+            connected_at=utc_isoformat()
+        )
+    
+    async def _register_client(self, websocket: WebSocket, client_id: str):
+        """
+        Store the connection, create its state and start its transcription worker
+        
+        Args:
+            websocket: WebSocket connection
+            client_id: Unique client identifier
+        """
+        # Idempotent; starts the handler's own scheduler on first connection
+        if self.batch_scheduler is not None:
+            await self.batch_scheduler.start()
+        
+        self.active_connections[client_id] = websocket
+        # Lets send_message find the client of a failed socket in O(1)
+        websocket.state.client_id = client_id
+        state = self._create_client_state(client_id)
+        state.worker = asyncio.create_task(
+            self._transcription_worker(websocket, client_id, state)
+        )
+        self.connection_states[client_id] = state
     
     async def connect(self, websocket: WebSocket, client_id: str):
         """
@@ -53,21 +162,8 @@ class WebSocketHandler:
         """
         await websocket.accept()
         
-        # Store connection
-        self.active_connections[client_id] = websocket
-        
-        # Initialize client state
-        self.connection_states[client_id] = {
-            'connected_at': datetime.utcnow().isoformat(),
-            'audio_processor': AudioProcessor(max_segment_duration_s=5.0),
-            'transcription_stream': TranscriptionStream(
-                self.asr_model,
-                device='cuda' if torch.cuda.is_available() else 'cpu'
-            ),
-            'total_audio_duration': 0.0,
-            'total_segments': 0,
-            'is_recording': False
-        }
+        # Store connection and initialize client state
+        await self._register_client(websocket, client_id)
         
         # Send welcome message
         await self.send_message(websocket, {
@@ -78,7 +174,7 @@ class WebSocketHandler:
             'protocol_version': '1.0',
             'supported_audio_formats': {
                 'sample_rates': [16000, 44100, 48000],
-                'encodings': ['pcm16', 'float32'],
+                'encodings': ['pcm16'],
                 'channels': [1, 2]
             }
         })
@@ -96,20 +192,7 @@ class WebSocketHandler:
         try:
             # Don't call connect() - FastAPI already accepted the connection
             # Just initialize the client state directly
-            self.active_connections[client_id] = websocket
-            
-            # Initialize client state
-            self.connection_states[client_id] = {
-                'connected_at': datetime.utcnow().isoformat(),
-                'audio_processor': AudioProcessor(max_segment_duration_s=5.0),
-                'transcription_stream': TranscriptionStream(
-                    self.asr_model,
-                    device='cuda' if torch.cuda.is_available() else 'cpu'
-                ),
-                'total_audio_duration': 0.0,
-                'total_segments': 0,
-                'is_recording': False
-            }
+            await self._register_client(websocket, client_id)
             
             # Send welcome message
             await self.send_message(websocket, {
@@ -120,31 +203,49 @@ class WebSocketHandler:
                 'protocol_version': '1.0',
                 'supported_audio_formats': {
                     'sample_rates': [16000, 44100, 48000],
-                    'encodings': ['pcm16', 'float32'],
+                    'encodings': ['pcm16'],
                     'channels': [1, 2]
                 }
             })
             
-            # Handle messages until disconnection
-            while True:
-                try:
-                    # Wait for message from client
-                    message = await websocket.receive()
+            # Receive on a separate task so bursts of frames can be drained together
+            frames: asyncio.Queue = asyncio.Queue()
+            pump = asyncio.create_task(self.pump_frames(websocket, frames))
+            
+            try:
+                # Handle messages until disconnection
+                disconnected = False
+                while not disconnected:
+                    # Wait for one frame, then drain everything already buffered
+                    messages = [await frames.get()]
+                    while not frames.empty():
+                        messages.append(frames.get_nowait())
                     
-                    # Handle different message types
-                    if message['type'] == 'websocket.receive':
-                        if 'bytes' in message:
+                    # Dispatch in arrival order; consecutive audio frames go over as one batch
+                    audio_frames = []
+                    for message in messages:
+                        if message['type'] == 'websocket.disconnect':
+                            disconnected = True
+                            break
+                        
+                        # The frame opcode decides the route; no payload sniffing
+                        if message.get('bytes') is not None:
                             # Binary data (audio)
-                            await self.handle_message(websocket, client_id, message['bytes'])
-                        elif 'text' in message:
+                            audio_frames.append(message['bytes'])
+                        elif message.get('text') is not None:
                             # Text data (JSON control)
-                            await self.handle_message(websocket, client_id, message['text'])
-                    elif message['type'] == 'websocket.disconnect':
-                        break
+                            if audio_frames:
+                                await self.handle_bytes_batch(websocket, client_id, audio_frames)
+                                audio_frames = []
+                            await self.handle_control(websocket, client_id, message['text'])
+                    
+                    if audio_frames:
+                        await self.handle_bytes_batch(websocket, client_id, audio_frames)
                         
-                except Exception as e:
-                    logger.error(f"Error handling message from {client_id}: {e}")
-                    break
+            except Exception as e:
+                logger.error(f"Error handling message from {client_id}: {e}")
+            finally:
+                pump.cancel()
                     
         except Exception as e:
             logger.error(f"WebSocket session error for {client_id}: {e}")
@@ -152,6 +253,28 @@ class WebSocketHandler:
             # Always disconnect cleanly
             await self.disconnect(client_id)
     
+    @staticmethod
+    async def pump_frames(websocket: WebSocket, frames: asyncio.Queue):
+        """
+        Move ASGI receive events into a local queue so bursts can be drained together
+        
+        Always finishes with a websocket.disconnect event so the consumer never
+        waits on a dead socket.
+        
+        Args:
+            websocket: WebSocket connection
+            frames: Queue receiving the raw ASGI events
+        """
+        try:
+            while True:
+                message = await websocket.receive()
+                frames.put_nowait(message)
+                if message['type'] == 'websocket.disconnect':
+                    return
+        except Exception as e:
+            logger.debug(f"WebSocket receive pump stopped: {e}")
+            frames.put_nowait({'type': 'websocket.disconnect'})
+    
     async def disconnect(self, client_id: str):
         """
         Handle WebSocket disconnection
@@ -159,18 +282,31 @@ class WebSocketHandler:
         Args:
             client_id: Client identifier
         """
-        if client_id in self.active_connections:
-            del self.active_connections[client_id]
+        self.active_connections.pop(client_id, None)
         
         if client_id in self.connection_states:
             state = self.connection_states[client_id]
+            
+            worker = state.worker
+            if worker is not None:
+                worker.cancel()
+                try:
+                    await worker
+                except asyncio.CancelledError:
+                    pass
+            
             logger.info(
                 f"Client {client_id} disconnected. "
-                f"Duration: {state.get('total_audio_duration', 0):.1f}s, "
-                f"Segments: {state.get('total_segments', 0)}"
+                f"Duration: {state.total_audio_duration:.1f}s, "
+                f"Segments: {state.total_segments}"
             )
             del self.connection_states[client_id]
     
+    async def shutdown(self):
+        """Stop the batch scheduler if this handler created it"""
+        if self._owns_scheduler:
+            await self.batch_scheduler.stop()
+    
     async def handle_message(
         self,
         websocket: WebSocket,
@@ -178,7 +314,11 @@ class WebSocketHandler:
         message: Union[bytes, str]
     ):
         """
-        Route and handle incoming WebSocket messages
+        Route and handle incoming WebSocket messages of unknown frame type
+        
+        Kept for callers that cannot tell binary and text frames apart; the
+        server endpoints route on the frame opcode instead (binary frames to
+        _handle_audio_data, text frames to handle_control).
         
         Args:
             websocket: WebSocket connection
@@ -186,37 +326,65 @@ class WebSocketHandler:
             message: Raw message bytes or text
         """
         try:
-            # Debug: Log detailed message classification info
-            if isinstance(message, str):
-                logger.info(f"🔤 MSG-DEBUG: String message, length={len(message)}, type=str, first_chars='{message[:20]}...'")
-                classification = "control-string"
-            elif isinstance(message, bytes):
-                first_byte = message[:1]
-                logger.info(f"🔢 MSG-DEBUG: Bytes message, length={len(message)}, first_byte=0x{first_byte.hex() if first_byte else '??'}, first_4_bytes={message[:4].hex()}")
-                if first_byte == b'{':
-                    logger.info(f"📋 MSG-DEBUG: Bytes message starts with '{{' - routing to control handler")
-                    classification = "control-bytes"
-                else:
-                    logger.info(f"🎵 MSG-DEBUG: Bytes message does NOT start with '{{' - routing to audio handler")
-                    classification = "audio"
-            else:
-                logger.warning(f"❓ MSG-DEBUG: Unknown message type: {type(message)}")
-                classification = "unknown"
-            
-            # Check if message is JSON control message or binary audio
-            if isinstance(message, str) or (isinstance(message, bytes) and message[:1] == b'{'):
+            # Check if message is JSON control message or binary audio;
+            # indexing gives an int, so no 1-byte slice is allocated per frame
+            if isinstance(message, str) or (message and message[0] == 0x7B):
                 # JSON control message (string or JSON bytes)
-                logger.info(f"🎯 MSG-DEBUG: Routing {classification} to CONTROL handler")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(
+                        "🎯 MSG-DEBUG: Routing control-%s message, length=%d, to CONTROL handler",
+                        type(message).__name__, len(message)
+                    )
                 await self._handle_control_message(websocket, client_id, message)
             else:
                 # Binary audio data
-                logger.info(f"🎯 MSG-DEBUG: Routing {classification} to AUDIO handler")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(
+                        "🎯 MSG-DEBUG: Routing audio message, length=%d, first_4_bytes=%s, to AUDIO handler",
+                        len(message), message[:4].hex()
+                    )
                 await self._handle_audio_data(websocket, client_id, message)
                 
         except Exception as e:
             logger.error(f"Message handling error for {client_id}: {e}")
             await self.send_error(websocket, str(e))
     
+    async def handle_control(self, websocket: WebSocket, client_id: str, text: str):
+        """
+        Handle a text frame (always a JSON control message)
+        
+        Args:
+            websocket: WebSocket connection
+            client_id: Client identifier
+            text: JSON message text
+        """
+        try:
+            await self._handle_control_message(websocket, client_id, text)
+        except Exception as e:
+            logger.error(f"Message handling error for {client_id}: {e}")
+            await self.send_error(websocket, str(e))
+    
+    async def handle_bytes_batch(
+        self,
+        websocket: WebSocket,
+        client_id: str,
+        frames: List[bytes]
+    ):
+        """
+        Handle a burst of binary (audio) frames drained from the socket in one pass
+        
+        Every frame still goes through VAD and segmentation, but partial
+        transcription runs at most once per burst, after the last frame.
+        
+        Args:
+            websocket: WebSocket connection
+            client_id: Client identifier
+            frames: Binary messages in arrival order
+        """
+        last = len(frames) - 1
+        for i, frame in enumerate(frames):
+            await self._handle_audio_data(websocket, client_id, frame, allow_partial=(i == last))
+    
     async def _handle_control_message(
         self,
         websocket: WebSocket,
@@ -232,50 +400,48 @@ class WebSocketHandler:
             message: JSON message bytes or string
         """
         try:
-            # Handle both string and bytes
+            # Handle both string and bytes; orjson parses bytes without a decode pass
             if isinstance(message, str):
-                logger.info(f"🔤 CTRL-DEBUG: Processing string control message, length={len(message)}")
-                data = json.loads(message)
+                logger.debug("🔤 CTRL-DEBUG: Processing string control message, length=%d", len(message))
+                data = orjson.loads(message)
             else:
-                logger.info(f"🔢 CTRL-DEBUG: Processing bytes control message, length={len(message)}, first_4_bytes={message[:4].hex()}")
-                # Defensive handling for potential binary audio data misclassification
+                logger.debug("🔢 CTRL-DEBUG: Processing bytes control message, length=%d", len(message))
                 try:
-                    decoded_text = message.decode('utf-8')
-                    logger.info(f"✅ CTRL-DEBUG: Successfully decoded bytes to UTF-8, length={len(decoded_text)}")
-                    data = json.loads(decoded_text)
-                except UnicodeDecodeError as e:
-                    # Binary audio data was mistakenly routed here - redirect to audio handler
-                    logger.warning(f"🚨 CTRL-DEBUG: UTF-8 DECODE ERROR - Binary data misrouted to control handler!")
-                    logger.warning(f"🔍 CTRL-DEBUG: Error details: {e}")
-                    logger.warning(f"📊 CTRL-DEBUG: Message info: type={type(message)}, length={len(message)}, first_8_bytes={message[:8].hex()}")
-                    logger.warning(f"🔄 CTRL-DEBUG: Redirecting to audio handler as defensive measure")
-                    await self._handle_audio_data(websocket, client_id, message)
-                    return
+                    data = orjson.loads(message)
+                except orjson.JSONDecodeError:
+                    # Defensive handling for potential binary audio data misclassification
+                    try:
+                        message.decode('utf-8')
+                    except UnicodeDecodeError as e:
+                        # Binary audio data was mistakenly routed here - redirect to audio handler
+                        logger.warning("🚨 CTRL-DEBUG: UTF-8 DECODE ERROR - Binary data misrouted to control handler!")
+                        logger.warning("🔍 CTRL-DEBUG: Error details: %s", e)
+                        logger.warning(
+                            "📊 CTRL-DEBUG: Message info: type=%s, length=%d, first_8_bytes=%s",
+                            type(message), len(message), message[:8].hex()
+                        )
+                        logger.warning("🔄 CTRL-DEBUG: Redirecting to audio handler as defensive measure")
+                        await self._handle_audio_data(websocket, client_id, message)
+                        return
+                    raise
             message_type = data.get('type')
             
-            if message_type == 'start_recording':
-                await self._start_recording(websocket, client_id, data)
-            
-            elif message_type == 'stop_recording':
-                await self._stop_recording(websocket, client_id)
-            
-            elif message_type == 'configure':
-                await self._configure_stream(websocket, client_id, data)
-            
-            elif message_type == 'ping':
-                await self.send_message(websocket, {'type': 'pong'})
-            
-            else:
+            # One dict lookup instead of walking a string-compare chain
+            handler = self._CONTROL_HANDLERS.get(message_type)
+            if handler is None:
                 logger.warning(f"Unknown message type: {message_type}")
+            else:
+                await handler(self, websocket, client_id, data)
                 
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             await self.send_error(websocket, f"Invalid JSON: {e}")
     
     async def _handle_audio_data(
         self,
         websocket: WebSocket,
         client_id: str,
-        audio_data: bytes
+        audio_data: bytes,
+        allow_partial: bool = True
     ):
         """
         Handle binary audio data
@@ -284,55 +450,106 @@ class WebSocketHandler:
             websocket: WebSocket connection
             client_id: Client identifier
             audio_data: Raw audio bytes
+            allow_partial: Whether this chunk may trigger a partial transcription
         """
-        logger.info(f"🎵 AUDIO-DEBUG: Processing audio data, length={len(audio_data)}, first_4_bytes={audio_data[:4].hex() if len(audio_data) >= 4 else audio_data.hex()}")
-        
         state = self.connection_states.get(client_id)
-        if not state or not state.get('is_recording'):
-            logger.info(f"🚫 AUDIO-DEBUG: Ignoring audio data - not recording (state={bool(state)}, is_recording={state.get('is_recording') if state else None})")
+        if not state or not state.is_recording:
+            logger.debug("🚫 AUDIO-DEBUG: Ignoring %d bytes of audio - not recording", len(audio_data))
             return
         
         try:
-            # Process audio chunk
-            audio_processor = state['audio_processor']
-            transcription_stream = state['transcription_stream']
+            audio_processor = state.audio_processor
             
             # Process the audio chunk
             audio_array, is_segment_end = audio_processor.process_chunk(audio_data)
             
-            # If segment ended, transcribe it
+            # If segment ended, queue it for transcription
             if is_segment_end:
                 segment = audio_processor.get_segment()
+                state.last_partial_samples = 0
                 if segment is not None and len(segment) > 0:
-                    # Transcribe segment
-                    result = await transcription_stream.transcribe_segment(
-                        segment,
-                        sample_rate=16000,
-                        is_final=True
-                    )
-                    
-                    # Send transcription result
-                    await self.send_message(websocket, result)
-                    
-                    # Update state
-                    state['total_segments'] += 1
-                    state['total_audio_duration'] += len(segment) / 16000
+                    # Finals are never dropped; a full queue backs off ingest
+                    await state.segment_queue.put((segment, True))
             
-            # Optionally send partial results for long segments
-            elif len(audio_processor.current_segment) > 16000:  # > 1 second
-                partial_segment = np.array(audio_processor.current_segment)
-                result = await transcription_stream.transcribe_segment(
-                    partial_segment,
-                    sample_rate=16000,
-                    is_final=False
-                )
-                result['type'] = 'partial'
-                await self.send_message(websocket, result)
+            # Optionally queue a partial once enough new audio has built up,
+            # one at a time. The worker reads it later, after the segment
+            # buffer may have been reset, so the partial is a copy.
+            elif (
+                allow_partial
+                and not state.partial_queued
+                and audio_processor.segment_samples - state.last_partial_samples >= PARTIAL_MIN_NEW_SAMPLES
+                and time.monotonic() - state.last_partial_at >= PARTIAL_MIN_INTERVAL_S
+            ):
+                try:
+                    state.segment_queue.put_nowait((audio_processor.peek_segment(), False))
+                    state.partial_queued = True
+                    state.last_partial_samples = audio_processor.segment_samples
+                    state.last_partial_at = time.monotonic()
+                except asyncio.QueueFull:
+                    # Worker is behind; the next chunk will offer a fresher partial
+                    pass
                 
         except Exception as e:
             logger.error(f"Audio processing error: {e}")
             await self.send_error(websocket, f"Audio processing failed: {e}")
     
+    async def _transcription_worker(
+        self,
+        websocket: WebSocket,
+        client_id: str,
+        state: ConnectionState
+    ):
+        """
+        Transcribe queued segments in FIFO order and send the results
+        
+        Runs for the lifetime of the connection so audio ingest never waits
+        on inference. Cancelling the worker waits for an in-flight
+        transcription to complete and drops its result.
+        
+        Args:
+            websocket: WebSocket connection
+            client_id: Client identifier
+            state: Client state owning the segment queue
+        """
+        queue = state.segment_queue
+        transcription_stream = state.transcription_stream
+        
+        while True:
+            segment, is_final = await queue.get()
+            try:
+                if not is_final:
+                    state.partial_queued = False
+                
+                inflight = asyncio.ensure_future(transcription_stream.transcribe_segment(
+                    segment,
+                    sample_rate=16000,
+                    is_final=is_final
+                ))
+                try:
+                    result = await asyncio.shield(inflight)
+                except asyncio.CancelledError:
+                    # Disconnect mid-inference: let the model call finish so the
+                    # GPU semaphore and staging buffers are not released under it
+                    await asyncio.wait((inflight,))
+                    if not inflight.cancelled():
+                        inflight.exception()  # Retrieve it; the client is gone
+                    raise
+                
+                if is_final:
+                    state.total_segments += 1
+                    state.total_audio_duration += len(segment) / 16000
+                else:
+                    result['type'] = 'partial'
+                
+                # Send transcription result
+                await self.send_message(websocket, result)
+                
+            except Exception as e:
+                logger.error(f"Transcription worker error for {client_id}: {e}")
+                await self.send_error(websocket, f"Audio processing failed: {e}")
+            finally:
+                queue.task_done()
+    
     async def _start_recording(
         self,
         websocket: WebSocket,
@@ -352,55 +569,59 @@ class WebSocketHandler:
             return
         
         # Reset processors
-        state['audio_processor'].reset()
-        state['transcription_stream'].reset()
-        state['is_recording'] = True
+        state.audio_processor.reset()
+        state.transcription_stream.reset()
+        state.last_partial_samples = 0
+        state.is_recording = True
         
         # Send confirmation
         await self.send_message(websocket, {
             'type': 'recording_started',
-            'timestamp': datetime.utcnow().isoformat(),
+            'timestamp': utc_isoformat(),
             'config': config
         })
         
         logger.info(f"Recording started for {client_id}")
     
-    async def _stop_recording(self, websocket: WebSocket, client_id: str):
+    async def _stop_recording(
+        self,
+        websocket: WebSocket,
+        client_id: str,
+        message: Optional[Dict[str, Any]] = None
+    ):
         """
         Stop recording session
         
         Args:
             websocket: WebSocket connection
             client_id: Client identifier
+            message: Stop message (unused; accepted for control dispatch)
         """
         state = self.connection_states.get(client_id)
         if not state:
             return
         
-        state['is_recording'] = False
+        state.is_recording = False
         
         # Process any remaining audio
-        audio_processor = state['audio_processor']
+        audio_processor = state.audio_processor
         segment = audio_processor.get_segment()
         
         if segment is not None and len(segment) > 0:
-            transcription_stream = state['transcription_stream']
-            result = await transcription_stream.transcribe_segment(
-                segment,
-                sample_rate=16000,
-                is_final=True
-            )
-            await self.send_message(websocket, result)
+            await state.segment_queue.put((segment, True))
+        
+        # Wait for the worker to send every queued result
+        await state.segment_queue.join()
         
         # Send final transcript
-        full_transcript = state['transcription_stream'].get_full_transcript()
+        full_transcript = state.transcription_stream.get_full_transcript()
         
         await self.send_message(websocket, {
             'type': 'recording_stopped',
             'final_transcript': full_transcript,
-            'total_duration': state['total_audio_duration'],
-            'total_segments': state['total_segments'],
-            'timestamp': datetime.utcnow().isoformat()
+            'total_duration': state.total_audio_duration,
+            'total_segments': state.total_segments,
+            'timestamp': utc_isoformat()
         })
         
         logger.info(f"Recording stopped for {client_id}")
@@ -424,7 +645,7 @@ class WebSocketHandler:
             return
         
         # Update audio processor configuration
-        processor = state['audio_processor']
+        processor = state.audio_processor
         
         if 'sample_rate' in config:
             processor.target_sample_rate = config['sample_rate']
@@ -438,6 +659,22 @@ class WebSocketHandler:
             'config': config
         })
     
+    async def _handle_ping(
+        self,
+        websocket: WebSocket,
+        client_id: str,
+        message: Dict[str, Any]
+    ):
+        """
+        Answer a keepalive ping
+        
+        Args:
+            websocket: WebSocket connection
+            client_id: Client identifier
+            message: Ping message (unused)
+        """
+        await self.send_message(websocket, {'type': 'pong'})
+    
     async def send_message(self, websocket: WebSocket, message: Dict[str, Any]):
         """
         Send JSON message to client
@@ -447,19 +684,19 @@ class WebSocketHandler:
             message: Message dictionary
         """
         try:
-            logger.info(f"📤 SEND-DEBUG: Sending message to client: type={message.get('type')}, text='{message.get('text', 'N/A')[:50]}...'")
-            await websocket.send_json(message)
-            logger.info(f"✅ SEND-DEBUG: Message sent successfully")
+            # orjson encodes numpy values directly; the event goes straight to
+            # the ASGI send as a text frame, which is what the JS clients parse
+            await websocket.send({
+                'type': 'websocket.send',
+                'text': orjson.dumps(message, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+            })
+            logger.debug("📤 SEND-DEBUG: Sent %s message to client", message.get('type'))
         except Exception as e:
             logger.error(f"Failed to send message: {e}")
             # Remove from active connections if send fails
-            client_id = None
-            for cid, ws in self.active_connections.items():
-                if ws == websocket:
-                    client_id = cid
-                    break
-            if client_id and client_id in self.active_connections:
-                del self.active_connections[client_id]
+            client_id = getattr(websocket.state, 'client_id', None)
+            if client_id is not None:
+                self.active_connections.pop(client_id, None)
     
     async def send_error(self, websocket: WebSocket, error: str):
         """
@@ -472,5 +709,13 @@ class WebSocketHandler:
         await self.send_message(websocket, {
             'type': 'error',
             'error': error,
-            'timestamp': datetime.utcnow().isoformat()
-        })
\ No newline at end of file
+            'timestamp': utc_isoformat()
+        })
+    
+    # Control message type -> handler(self, websocket, client_id, message)
+    _CONTROL_HANDLERS = {
+        'start_recording': _start_recording,
+        'stop_recording': _stop_recording,
+        'configure': _configure_stream,
+        'ping': _handle_ping,
+    }